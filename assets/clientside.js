@@ -0,0 +1,52 @@
+// Clientside versions of the threshold filters, used when the apps run
+// with CLIENTSIDE_FILTERING=1. The full figure is shipped once in a
+// dcc.Store as {axis: 'x', figure: {...}} and filtered in the browser.
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    filters: {
+        threshold: function(value, stored) {
+            if (!stored) {
+                return window.dash_clientside.no_update;
+            }
+            var figure = stored.figure;
+            if (value === null || value === undefined) {
+                return figure;
+            }
+
+            function keep(v) {
+                // dates arrive as ISO strings, which compare correctly as text
+                return typeof v === 'string' ? v >= String(value) : v >= value;
+            }
+
+            function pick(arr, mask) {
+                return arr.filter(function(_, i) { return mask[i]; });
+            }
+
+            var data = figure.data.map(function(trace) {
+                var axis = trace[stored.axis] || [];
+                var mask = axis.map(keep);
+                var out = Object.assign({}, trace);
+
+                ['x', 'y', 'text', 'hovertext', 'customdata'].forEach(function(key) {
+                    if (Array.isArray(trace[key]) && trace[key].length === mask.length) {
+                        out[key] = pick(trace[key], mask);
+                    }
+                });
+                return out;
+            });
+
+            var layout = Object.assign({}, figure.layout);
+            var axisKey = stored.axis + 'axis';
+            var ticks = layout[axisKey] && layout[axisKey].tickvals;
+            if (Array.isArray(ticks)) {
+                var tickMask = ticks.map(keep);
+                layout[axisKey] = Object.assign({}, layout[axisKey], {
+                    tickvals: pick(ticks, tickMask),
+                    ticktext: pick(layout[axisKey].ticktext || ticks, tickMask)
+                });
+            }
+
+            return {data: data, layout: layout};
+        }
+    }
+});
@@ -0,0 +1,138 @@
+"""Opt-in background callbacks for the slow slider and date-picker figures.
+
+BACKGROUND_CALLBACKS=1 runs those callbacks in worker processes started by
+Dash's DiskcacheManager instead of on the request thread: the browser
+polls for progress and the result, so a figure that takes seconds no
+longer blocks a gunicorn worker or runs into its timeout.
+
+Jobs and results live in JOBS_CACHE_DIR, shared by every worker. Results
+are kept per data version, and a request for a job that is already
+running joins it instead of starting another one, so many users moving a
+slider to the same value cost one computation.
+
+Needs diskcache, multiprocess and psutil (`pip install "dash[diskcache]"`),
+imported only when the mode is on.
+"""
+import os
+from functools import wraps
+
+from dash import Output, DiskcacheManager
+
+
+ENABLED = os.environ.get('BACKGROUND_CALLBACKS', '0') == '1'
+CACHE_DIR = os.environ.get('JOBS_CACHE_DIR', 'assets/.jobs_cache')
+
+# seconds a result is kept after it was last read
+EXPIRE = int(os.environ.get('JOBS_CACHE_TTL', 3600))
+
+# how often the browser asks for progress, in ms
+POLL_INTERVAL = 250
+
+HIDDEN = {'visibility': 'hidden'}
+VISIBLE = {'visibility': 'visible'}
+
+
+class SharedJobsManager(DiskcacheManager):
+    """DiskcacheManager that runs one job per cache key at a time.
+
+    Dash starts a process for every request; here a request whose key
+    already has a running job, or a stored result, is handed that job.
+    A job is only cancelled once every request waiting on it moved on.
+    """
+
+    def call_job_fn(self, key, job_fn, args, context):
+        with self.handle.transact():
+            job = self.handle.get(_job_key(key))
+            if job is not None and (self.job_running(job) or self.result_ready(key)):
+                self.handle.incr(_waiters_key(job), default=0, retry=True)
+                self.handle.touch(_job_key(key), expire=self.expire)
+                return job
+
+            job = super().call_job_fn(key, job_fn, args, context)
+            self.handle.set(_job_key(key), job, expire=self.expire)
+            self.handle.set(_waiters_key(job), 1, expire=self.expire)
+            return job
+
+    def terminate_job(self, job):
+        if job is None:
+            return
+        with self.handle.transact():
+            waiters = self.handle.get(_waiters_key(job))
+            if waiters is None:
+                # not started here, or already cancelled
+                return
+            if waiters > 1:
+                self.handle.set(_waiters_key(job), waiters - 1, expire=self.expire)
+                return
+            self.handle.delete(_waiters_key(job))
+        super().terminate_job(job)
+
+    def get_progress(self, key):
+        # left in place for the other requests on the same job
+        return self.handle.get(self._make_progress_key(key))
+
+
+def _job_key(key):
+    return f'{key}-job'
+
+
+def _waiters_key(job):
+    return f'job-{int(job)}-waiters'
+
+
+_managers = {}
+
+
+def manager(version):
+    """The job manager of one page; results are keyed by `version()` too."""
+    if version not in _managers:
+        import diskcache
+
+        _managers[version] = SharedJobsManager(diskcache.Cache(CACHE_DIR),
+                                               cache_by=[version], expire=EXPIRE)
+    return _managers[version]
+
+
+def options(progress_id, version):
+    """Extra callback keyword arguments: none unless BACKGROUND_CALLBACKS=1.
+
+    The progress bar `progress_id` (see `progress_bar`) is shown while
+    the job runs and filled by its `progress(percent)` calls.
+    """
+    if not ENABLED:
+        return {}
+    return dict(background=True,
+                manager=manager(version),
+                interval=POLL_INTERVAL,
+                progress=[Output(progress_id, 'value')],
+                progress_default=[0],
+                running=[(Output(progress_id, 'style'), VISIBLE, HIDDEN)])
+
+
+def progress_bar(progress_id):
+    if not ENABLED:
+        return None
+    import dash_bootstrap_components as dbc
+
+    return dbc.Progress(id=progress_id, value=0, striped=True, animated=True,
+                        style=HIDDEN)
+
+
+def no_progress(percent):
+    pass
+
+
+def reports_progress(func):
+    """Passes Dash's set_progress to `func` as `progress`, when jobs run in the background.
+
+    `func` takes `progress=no_progress` as its last argument, so it runs
+    unchanged as a plain callback.
+    """
+    if not ENABLED:
+        return func
+
+    @wraps(func)
+    def job(set_progress, *args):
+        return func(*args, progress=set_progress)
+
+    return job
@@ -0,0 +1,107 @@
+"""Import-time profile of the app, eager and with LAZY_STARTUP=1.
+
+    python benchmarks/import_profile.py
+    python benchmarks/import_profile.py --top 30 --modes lazy
+
+For every mode a fresh interpreter imports app.py under `-X importtime`;
+the report lists the slowest imports while booting (cumulative and self
+time), how long the boot takes, and how long the first request for the
+HR page (layout, then page content) takes with the modules it still has
+to import.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+MODES = {'eager': '0', 'lazy': '1'}
+
+# imports app.py, then asks for the layout and the HR page the way a browser would
+PROBE = r'''
+import sys, json, time
+start = time.perf_counter()
+import app
+booted = time.perf_counter() - start
+sys.stderr.write('-- booted --\n')
+client = app.server.test_client()
+start = time.perf_counter()
+assert client.get('/_dash-layout').status_code == 200
+page = {'output': '.._pages_content.children..._pages_store.data..',
+        'outputs': [{'id': '_pages_content', 'property': 'children'},
+                    {'id': '_pages_store', 'property': 'data'}],
+        'inputs': [{'id': '_pages_location', 'property': 'pathname', 'value': '/'},
+                   {'id': '_pages_location', 'property': 'search', 'value': ''}],
+        'changedPropIds': ['_pages_location.pathname']}
+assert client.post('/_dash-update-component', json=page).status_code == 200
+print(json.dumps({'import_s': booted, 'first_page_s': time.perf_counter() - start}))
+'''
+
+
+def parse_importtime(lines):
+    """[(module, depth, self_us, cumulative_us)] from `-X importtime` output."""
+    rows = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile(mode, env=None):
+    env = dict(os.environ, **(env or {}),
+               LAZY_STARTUP=MODES[mode],
+               PERCENTILE_OFFLINE='1',
+               PYTHONWARNINGS='ignore')
+    done = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if done.returncode != 0:
+        raise RuntimeError(f'{mode} probe failed:\n{done.stderr[-2000:]}')
+    boot, _, first_request = done.stderr.partition('-- booted --')
+    return (json.loads(done.stdout.strip().splitlines()[-1]),
+            parse_importtime(boot.splitlines()),
+            parse_importtime(first_request.splitlines()))
+
+
+def report(mode, timings, rows, deferred, top):
+    print(f'== {mode}: import {timings["import_s"]:.3f}s ({len(rows)} modules), '
+          f'first page {timings["first_page_s"]:.3f}s ({len(deferred)} more modules)')
+
+    # what app.py pulls in directly, each with everything below it; importtime
+    # lists a module's imports before the module itself
+    direct, pending = [], []
+    for row in rows:
+        if row[1] == 1:
+            pending.append(row)
+        elif row[1] == 0:
+            if row[0] == 'app':
+                direct = pending
+            pending = []
+    print(f'{"imported by app.py":40} {"cumulative ms":>14}')
+    for name, _, _, cumulative in sorted(direct, key=lambda r: -r[3])[:top]:
+        print(f'{name:40} {cumulative / 1000:14.1f}')
+
+    print(f'{"slowest modules":40} {"self ms":>14}')
+    for name, _, self_us, _ in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f'{name:40} {self_us / 1000:14.1f}')
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='*', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--top', type=int, default=15, help='modules listed per table')
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        report(mode, *profile(mode), args.top)
+
+
+if __name__ == '__main__':
+    main()
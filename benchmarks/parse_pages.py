@@ -0,0 +1,118 @@
+"""Parse time of salary pages, per parser backend.
+
+    python benchmarks/parse_pages.py --pages 500
+    python benchmarks/parse_pages.py --dir benchmarks/pages/
+
+Pages are synthetic (benchmarks/synthetic.py) unless --dir points at
+saved pages (*.do or *.html, searched recursively), such as the summary
+table of a real page in benchmarks/pages/. The str(row) matching loop the
+scraper used before is timed as the baseline, every backend is checked to
+read the same numbers as it, and every page to give every percentile line.
+"""
+import os
+import sys
+import time
+import glob
+import argparse
+
+import bs4
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+
+def baseline_parse(html):
+    out = {10: [], 25: [], 75: [], 90: []}
+
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', class_='summary')
+    for row in table.find_all('tr'):
+        for p in out:
+            if f"<td>{p}<sup>th</sup> Percentile</td>" in str(row):
+                for b in row.find_all('td', class_='fig'):
+                    text = b.text[1:]
+                    out[p].append(int(text.replace(",", "")) if text != "" else None)
+    return out
+
+
+def load_pages(directory, n):
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, '**', '*.do'), recursive=True)
+                       + glob.glob(os.path.join(directory, '**', '*.html'), recursive=True))
+        pages = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                pages.append(f.read())
+        return pages
+
+    from synthetic import make_salary_page
+    return [make_salary_page(seed) for seed in range(n)]
+
+
+def in_page_order(result):
+    # {percentile: {year: salary}} -> {percentile: [salary per column]}, as the baseline reads
+    return {p: list(by_year.values()) for p, by_year in result.items()}
+
+
+def check_percentiles(results, percentiles):
+    """Raises unless every page gave some figure for each percentile."""
+    for n, result in enumerate(results):
+        missing = [p for p in percentiles
+                   if not any(v is not None for v in result.get(p, []))]
+        assert not missing, f'page {n}: no figures for percentiles {missing}'
+
+
+def time_parser(parse, pages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [parse(page) for page in pages]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200, help='synthetic pages to parse')
+    parser.add_argument('--dir', help='parse the saved pages in DIR instead')
+    parser.add_argument('--repeat', type=int, default=3, help='best of this many passes')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import scraper
+
+    pages = load_pages(args.dir, args.pages)
+    if not pages:
+        sys.exit('no pages to parse')
+    print(f'{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1000:.1f} kB each')
+
+    parsers = {'baseline (str(row))': baseline_parse}
+    for backend in scraper.BACKENDS:
+        try:
+            scraper.parse(pages[0], backend)
+        except ImportError:
+            print(f'{backend}: not installed')
+            continue
+        parsers[backend] = lambda page, backend=backend: in_page_order(scraper.parse(page, backend))
+
+    expected = None
+    for name, parse in parsers.items():
+        seconds, results = time_parser(parse, pages, args.repeat)
+        if expected is None:
+            expected = results
+        else:
+            # the baseline has no median, compare the rows it does read
+            same = all({p: r[p] for p in e} == e for r, e in zip(results, expected))
+            assert same, f'{name} reads different numbers than the baseline'
+            check_percentiles(results, scraper.PERCENTILES)
+        print(f'{name:22} {seconds:8.3f}s {len(pages) / seconds:10.0f} pages/s')
+
+    # the whole batch into one frame, figures converted in a single call
+    seconds, frame = time_parser(lambda batch: scraper.parse_many(batch), [pages], args.repeat)
+    print(f'{"parse_many (" + scraper.BACKEND + ")":22} {seconds:8.3f}s '
+          f'{len(pages) / seconds:10.0f} pages/s, {frame[0].shape} frame')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""Startup and callback benchmarks for both dashboards on synthetic data.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --employees 1000 100000 10000000 --calls 100000
+    python benchmarks/run.py --compare benchmarks/results/a.json benchmarks/results/b.json
+
+Every measurement runs in a fresh interpreter, so import time and peak RSS
+are those of a newly booted worker. Results are written as JSON to
+benchmarks/results/ (or --out) to be compared across runs.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+import numpy as np
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+RESULTS_DIR = os.path.join(HERE, 'results')
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def latency(samples):
+    ms = np.array(samples) * 1000
+    return {'n': len(ms),
+            'mean_ms': round(float(ms.mean()), 3),
+            'p50_ms': round(float(np.percentile(ms, 50)), 3),
+            'p95_ms': round(float(np.percentile(ms, 95)), 3),
+            'max_ms': round(float(ms.max()), 3)}
+
+
+def time_callback(client, output, inputs, values, repeat, extra_inputs=()):
+    """Times the callback through Dash's own endpoint, serialization included.
+
+    `extra_inputs` are further {'id', 'property', 'value'} inputs that stay fixed.
+    """
+    out_id, out_prop = output.split('.')
+    in_id, in_prop = inputs.split('.')
+
+    samples, sizes = [], []
+    for _ in range(repeat):
+        for value in values:
+            body = {'output': output,
+                    'outputs': {'id': out_id, 'property': out_prop},
+                    'inputs': [{'id': in_id, 'property': in_prop, 'value': value},
+                               *extra_inputs],
+                    'changedPropIds': [inputs]}
+            start = time.perf_counter()
+            response = client.post('/_dash-update-component', json=body)
+            samples.append(time.perf_counter() - start)
+            sizes.append(len(response.data))
+            assert response.status_code == 200, response.data[:200]
+
+    return dict(latency(samples), bytes=int(np.mean(sizes)))
+
+
+def boot(page):
+    """Imports the app and loads one of its pages, like a worker serving only it."""
+    start = time.perf_counter()
+    import app
+    module = sys.modules[f'pages.{page}']
+    module.preload()
+    return app, module, time.perf_counter() - start
+
+
+def probe_hr(repeat):
+    app, hr, import_s = boot('hr')
+    import_rss = peak_rss_mb()
+
+    client = app.server.test_client()
+    callbacks = {
+        'update_figure': time_callback(client, 'graph-with-slider.figure',
+                                       'salary-slider.value',
+                                       hr.salary_states(), repeat),
+        'update_figure2': time_callback(client, 'graph-year-slider.figure',
+                                        'year-slider.value',
+                                        list(hr.year), repeat,
+                                        [{'id': 'salary-group', 'property': 'value',
+                                          'value': hr.ALL_EMPLOYEES}]),
+    }
+    return {'import_s': round(import_s, 3),
+            'import_rss_mb': round(import_rss, 1),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'callbacks': callbacks}
+
+
+def probe_calls(repeat):
+    app, calls, import_s = boot('calls')
+    import_rss = peak_rss_mb()
+
+    dates = calls.calls().views().by_date.Date
+    picks = [None] + [str(d.date()) for d in dates.iloc[::max(1, len(dates) // 10)]]
+
+    client = app.server.test_client()
+    callbacks = {
+        'update_plot': time_callback(client, 'line_plot.figure', 'date_picker.date',
+                                     picks, repeat,
+                                     [{'id': 'line_plot', 'property': 'relayoutData',
+                                       'value': None}]),
+    }
+    return {'import_s': round(import_s, 3),
+            'import_rss_mb': round(import_rss, 1),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'callbacks': callbacks}
+
+
+def run_probe(kind, env, repeat):
+    # only the probed page is loaded
+    env = dict(os.environ, **env,
+               LAZY_STARTUP='1',
+               PERCENTILE_OFFLINE='1',
+               CLIENTSIDE_FILTERING='0',
+               PYTHONWARNINGS='ignore')
+    done = subprocess.run([sys.executable, __file__, '--probe', kind, '--repeat', str(repeat)],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if done.returncode != 0:
+        raise RuntimeError(f'{kind} probe failed:\n{done.stderr}')
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def run(employees, calls, repeat, rollups=False):
+    sys.path.insert(0, HERE)
+    from synthetic import make_hr_db, make_calls_xlsx
+    sys.path.insert(0, ROOT)
+    import hr_rollups
+    import salary_sketches
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        percentiles = os.path.join(tmp, 'percentiles.json')
+
+        for n in employees:
+            db = os.path.join(tmp, f'hr_{n}.db')
+            start = time.perf_counter()
+            make_hr_db(db, n)
+            print(f'hr.db with {n} employees generated in {time.perf_counter() - start:.1f}s')
+            if rollups:
+                start = time.perf_counter()
+                hr_rollups.build(db)
+                salary_sketches.build(db)
+                print(f'rollups and salary sketches built in {time.perf_counter() - start:.1f}s')
+
+            result = run_probe('hr', {'HR_DB_FILE': db,
+                                      'PERCENTILE_CACHE_FILE': percentiles}, repeat)
+            results.append(dict(app='hr', rows=n, **result))
+            print(json.dumps(results[-1]))
+
+        for n in calls:
+            xlsx = os.path.join(tmp, f'calls_{n}.xlsx')
+            cache = os.path.join(tmp, f'calls_cache_{n}')
+            start = time.perf_counter()
+            make_calls_xlsx(xlsx, n)
+            print(f'dashboard.xlsx with {n} calls generated in {time.perf_counter() - start:.1f}s')
+
+            # first boot converts the workbook, the second reads the column cache
+            env = {'CALLS_FILE': xlsx, 'CALLS_CACHE_DIR': cache}
+            for boot in ('cold', 'warm'):
+                result = run_probe('calls', env, repeat)
+                results.append(dict(app='calls', rows=n, boot=boot, **result))
+                print(json.dumps(results[-1]))
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def flatten(report):
+        out = {}
+        for r in report['results']:
+            key = (r['app'], r['rows'], r.get('boot', ''))
+            out[key + ('import_s',)] = r['import_s']
+            out[key + ('peak_rss_mb',)] = r['peak_rss_mb']
+            for name, stats in r['callbacks'].items():
+                out[key + (f'{name}.p50_ms',)] = stats['p50_ms']
+                out[key + (f'{name}.p95_ms',)] = stats['p95_ms']
+                out[key + (f'{name}.bytes',)] = stats['bytes']
+        return out
+
+    before, after = flatten(old), flatten(new)
+    print(f"{'app':6} {'rows':>10} {'boot':5} {'metric':26} {'old':>10} {'new':>10} {'ratio':>7}")
+    for key in sorted(before.keys() & after.keys(), key=str):
+        a, b = before[key], after[key]
+        ratio = b / a if a else float('nan')
+        print(f'{key[0]:6} {key[1]:>10} {key[2]:5} {key[3]:26} {a:>10} {b:>10} {ratio:>7.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, nargs='*', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--calls', type=int, nargs='*', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='passes over every slider/date value per callback')
+    parser.add_argument('--rollups', action='store_true',
+                        help='run hr_rollups.py and salary_sketches.py on the generated databases first')
+    parser.add_argument('--out', help='result file, default benchmarks/results/<time>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--probe', choices=['hr', 'calls'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        sys.path.insert(0, ROOT)
+        probe = probe_hr if args.probe == 'hr' else probe_calls
+        print(json.dumps(probe(args.repeat)))
+        return
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'commit': git_commit(),
+              'python': platform.python_version(),
+              'machine': platform.machine(),
+              'rollups': args.rollups,
+              'results': run(args.employees, args.calls, args.repeat, args.rollups)}
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S.json'))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'results written to {out}')
+
+
+if __name__ == '__main__':
+    main()
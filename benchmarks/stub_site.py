@@ -0,0 +1,99 @@
+"""A local stand-in for itjobswatch.co.uk, to test and time the scraper.
+
+    python benchmarks/stub_site.py --pages 50 --delay 0.2
+    python benchmarks/stub_site.py --serve saved_pages/ --port 8000
+
+The first form writes synthetic pages (benchmarks/synthetic.py), serves
+them with `--delay` seconds of latency and `--fail` of the requests
+answered 503, and times one full scrape of all of them. The second only
+serves saved pages laid out as <dir>/jobs/<source>.do; point the app at
+it with SCRAPE_BASE_URL=http://127.0.0.1:8000 SCRAPE_SOURCES=uk/sqlite,...
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+
+class StubHandler(SimpleHTTPRequestHandler):
+    delay = 0
+    fail = 0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        if random.random() < self.fail:
+            self.send_error(503)
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def write_pages(directory, sources, seed=0):
+    from synthetic import make_salary_page
+
+    for n, source in enumerate(sources):
+        path = os.path.join(directory, 'jobs', f'{source}.do')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(make_salary_page(seed + n))
+
+
+def serve(directory, port=0, delay=0, fail=0):
+    """Serves `directory` from a background thread; returns (server, base_url)."""
+    handler = type('Handler', (StubHandler,), {'delay': delay, 'fail': fail})
+    server = ThreadingHTTPServer(('127.0.0.1', port), partial(handler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.2, help='seconds per response')
+    parser.add_argument('--fail', type=float, default=0.0, help='share of requests answered 503')
+    parser.add_argument('--workers', type=int, help='default SCRAPE_WORKERS')
+    parser.add_argument('--serve', metavar='DIR', help='only serve saved pages from DIR')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.serve:
+        server, url = serve(args.serve, args.port, args.delay, args.fail)
+        print(f'serving {args.serve} on {url}')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    sys.path.insert(0, ROOT)
+    import scraper
+
+    sources = [f'uk/tech{n}' for n in range(args.pages)]
+    workers = args.workers or scraper.WORKERS
+    with tempfile.TemporaryDirectory() as tmp:
+        write_pages(tmp, sources)
+        server, url = serve(tmp, 0, args.delay, args.fail)
+        try:
+            start = time.perf_counter()
+            result = scraper.scrape(sources, base_url=url, workers=workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+
+    print(f'{len(result)}/{len(sources)} pages with {workers} workers '
+          f'in {elapsed:.2f}s ({args.delay}s latency, {args.fail:.0%} failures)')
+
+
+if __name__ == '__main__':
+    main()
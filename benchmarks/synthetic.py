@@ -0,0 +1,160 @@
+"""Synthetic data for the benchmarks, shaped like assets/hr.db and
+assets/dashboard.xlsx but of any size, and itjobswatch-like salary pages.
+
+    python benchmarks/synthetic.py hr /tmp/hr.db 1000000
+    python benchmarks/synthetic.py calls /tmp/calls.xlsx 100000
+    python benchmarks/synthetic.py page /tmp/sqlite.do 0
+"""
+import sys
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+
+SOURCE_DB = 'assets/hr.db'
+
+# small lookup tables are copied as they are, only the fact tables grow
+LOOKUP_TABLES = ['regions', 'countries', 'locations', 'departments', 'jobs']
+HR_TABLES = LOOKUP_TABLES + ['employees', 'job_history']
+
+STATES = ['AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID',
+          'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS',
+          'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK',
+          'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV',
+          'WI', 'WY']
+OUTCOMES = ['Success', 'Failure', 'Time out']
+OUTCOME_WEIGHTS = [0.55, 0.35, 0.10]
+TIME_PERIODS = [f'{h}h00-{h + 1}h00' for h in range(7, 19)]
+
+CHUNK = 100_000
+
+# the summary rows of an itjobswatch page, one column per period, labelled as on the site
+SALARY_ROWS = [('10<sup>th</sup> Percentile', 0.55), ('25<sup>th</sup> Percentile', 0.75),
+               ('Median annual salary (50<sup>th</sup> Percentile)', 1.0),
+               ('75<sup>th</sup> Percentile', 1.3), ('90<sup>th</sup> Percentile', 1.65)]
+
+# rows next to them that mention the median without being a percentile
+MEDIAN_ROWS = ['Median % Change', 'UK median annual salary']
+
+
+def make_hr_db(path, n_employees, seed=0, source=SOURCE_DB):
+    """A copy of the HR schema with `n_employees` generated employees."""
+    rng = np.random.default_rng(seed)
+
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(path)) as dst:
+        for table in HR_TABLES:
+            sql, = src.execute("select sql from sqlite_master where name = ?;",
+                               (table,)).fetchone()
+            dst.execute(f"drop table if exists {table};")
+            dst.execute(sql)
+
+        for table in LOOKUP_TABLES:
+            rows = src.execute(f"select * from {table};").fetchall()
+            marks = ', '.join('?' * len(rows[0]))
+            dst.executemany(f"insert into {table} values ({marks});", rows)
+
+        jobs = pd.read_sql_query(
+            "select job_id, min_salary, max_salary from jobs where job_id <> 'job_id';", src)
+        departments = [row[0] for row in src.execute(
+            "select department_id from departments;")]
+
+        for start in range(0, n_employees, CHUNK):
+            n = min(CHUNK, n_employees - start)
+            ids = np.arange(start, start + n) + 100
+            job = rng.integers(0, len(jobs), n)
+            low = jobs.min_salary.to_numpy()[job]
+            high = jobs.max_salary.to_numpy()[job]
+            salary = rng.integers(low, high + 1)
+            department = rng.choice(departments, n)
+            hired = pd.Timestamp('1987-01-01') + pd.to_timedelta(rng.integers(0, 12000, n), 'D')
+
+            dst.executemany(
+                "insert into employees (employee_id, first_name, last_name, email,"
+                " phone_number, hire_date, job_id, salary, commission_pct,"
+                " manager_id, department_id) values (?, ?, ?, ?, ?, ?, ?, ?, 0, 100, ?);",
+                zip(ids.tolist(),
+                    (f'First{i}' for i in ids),
+                    (f'Last{i}' for i in ids),
+                    (f'E{i}' for i in ids),
+                    (f'515.123.{i % 10000:04d}' for i in ids),
+                    hired.strftime('%Y-%m-%d'),
+                    jobs.job_id.to_numpy()[job].tolist(),
+                    salary.tolist(),
+                    department.tolist()))
+
+            # roughly one earlier position for every tenth employee
+            moved = rng.random(n) < 0.1
+            end = hired[moved] - pd.Timedelta(days=1)
+            begin = end - pd.to_timedelta(rng.integers(200, 3000, moved.sum()), 'D')
+            dst.executemany(
+                "insert into job_history values (?, ?, ?, ?, ?);",
+                zip(ids[moved].tolist(),
+                    begin.strftime('%Y-%m-%d'),
+                    end.strftime('%Y-%m-%d'),
+                    jobs.job_id.to_numpy()[rng.integers(0, len(jobs), moved.sum())].tolist(),
+                    rng.choice(departments, moved.sum()).tolist()))
+            dst.commit()
+
+
+def make_calls(n_rows, seed=0, days=365):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Country': 'US',
+        'State': rng.choice(STATES, n_rows),
+        'Time_Period': rng.choice(TIME_PERIODS, n_rows),
+        'Outcome': rng.choice(OUTCOMES, n_rows, p=OUTCOME_WEIGHTS),
+        'Date': np.sort(pd.Timestamp('2021-04-01').to_datetime64()
+                        + rng.integers(0, days, n_rows).astype('timedelta64[D]')),
+    })
+
+
+def make_calls_xlsx(path, n_rows, seed=0):
+    """A call log workbook with the same `data` sheet as dashboard.xlsx."""
+    make_calls(n_rows, seed).to_excel(path, sheet_name='data', index=False)
+
+
+def make_salary_page(seed=0, periods=3, filler_rows=40):
+    """HTML with the summary table of an itjobswatch.co.uk job page.
+
+    Percentile rows hold `periods` salaries like `£52,500`, with `-` for a
+    period without data, among `filler_rows` rows the scraper skips.
+    """
+    rng = np.random.default_rng(seed)
+    median = rng.integers(35, 90) * 1000
+
+    # newest period first, as on the site
+    rows = ['<tr><th></th>' + ''.join(f'<th>Same period {2022 - p}</th>' for p in range(periods))
+            + '</tr>']
+    rows += [f'<tr><td>Rank change</td><td class="fig">{rng.integers(-50, 50)}</td></tr>'
+             for _ in range(filler_rows // 2)]
+    for label, share in SALARY_ROWS:
+        figs = []
+        for _ in range(periods):
+            if rng.random() < 0.05:
+                figs.append('<td class="fig">-</td>')
+            else:
+                value = int(median * share * rng.uniform(0.9, 1.1)) // 250 * 250
+                figs.append(f'<td class="fig">£{value:,}</td>')
+        rows.append(f'<tr><td>{label}</td>{"".join(figs)}</tr>')
+    rows += [f'<tr><td>{label}</td><td class="fig">{rng.integers(-20, 20)}%</td></tr>'
+             for label in MEDIAN_ROWS]
+    rows += [f'<tr><td>Permanent jobs</td><td class="fig">{rng.integers(0, 5000):,}</td></tr>'
+             for _ in range(filler_rows - filler_rows // 2)]
+
+    return ('<!DOCTYPE html><html><head><title>Salary</title></head><body>'
+            '<div class="content"><table class="summary">'
+            + ''.join(rows)
+            + '</table></div></body></html>')
+
+
+if __name__ == '__main__':
+    kind, target, size = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    if kind == 'hr':
+        make_hr_db(target, size)
+    elif kind == 'page':
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(make_salary_page(size))
+    else:
+        make_calls_xlsx(target, size)
@@ -0,0 +1,61 @@
+"""Builds the on-disk datasets before the web processes start.
+
+    python build_data.py
+
+Workers then only memory-map or read the finished files. Running this is
+optional: a preloaded gunicorn master (see gunicorn.conf.py) builds
+whatever is missing on import, once, before forking.
+"""
+import os
+import time
+
+import erd
+import hr_rollups
+import salary_sketches
+from calls_data import load_calls
+import percentile_cache
+from percentile_cache import PercentileCache
+import scraper
+
+
+def build_calls():
+    # writes assets/.calls_cache if the workbook changed since the last build
+    load_calls()
+
+
+def build_percentiles():
+    # PERCENTILE_OFFLINE=1 serves the snapshot on disk as it is
+    if percentile_cache.OFFLINE:
+        print('PERCENTILE_OFFLINE=1, percentile snapshot not refreshed')
+        return
+    # a failed scrape keeps whatever snapshot is already on disk
+    PercentileCache(scraper.scrape).refresh()
+
+
+def build_rollups():
+    # header copies out, join keys indexed, aggregates kept by triggers
+    hr_rollups.build(os.environ.get('HR_DB_FILE', 'assets/hr.db'))
+
+
+def build_sketches():
+    # only the employees added since the last build are read
+    salary_sketches.build(os.environ.get('HR_DB_FILE', 'assets/hr.db'))
+
+
+def build_erd():
+    # renders assets/erd/erd-<schema hash>.png unless it already exists
+    print(erd.diagram(os.environ.get('HR_DB_FILE', 'assets/hr.db')))
+
+
+STEPS = [('calls column cache', build_calls),
+         ('percentile snapshot', build_percentiles),
+         ('HR rollups', build_rollups),
+         ('salary sketches', build_sketches),
+         ('ERD image', build_erd)]
+
+
+if __name__ == '__main__':
+    for name, step in STEPS:
+        start = time.perf_counter()
+        step()
+        print(f'{name}: {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,124 @@
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from calls_schema import hours
+
+
+KEYS = ['Date', 'State', 'Hour', 'Time_Period']
+# the counters: per Date, per State and per (Hour, Time_Period)
+LEVELS = ['Date', 'State', ['Hour', 'Time_Period']]
+OUTCOMES = ['Success', 'Failure']
+
+CallViews = namedtuple('CallViews', [
+    'by_date',            # a) Date, Total, Success, Failure
+    'by_state',           # b) State, Success, Failure
+    'outcomes',           # c) number of calls per Outcome, largest first
+    'state_success',      # d) success share per State in %, largest first
+    'state_totals',       # e) calls per State
+    'state_successes',    # e) successful calls per State
+    'success_by_period',  # f) successful calls per Time_Period, by start hour
+])
+
+
+def count_outcomes(df):
+    """One vectorized pass: calls per (Date, State, Hour, Time_Period) x Outcome."""
+    # observed: only the combinations that occur, not every product of categories
+    counts = (df.groupby(KEYS + ['Outcome'], dropna=False, observed=True)
+                .size()
+                .unstack('Outcome', fill_value=0))
+    # plain labels, so counters of batches with other categories still add up
+    counts.index = counts.index.set_levels([level.astype(object)
+                                            if isinstance(level, pd.CategoricalIndex) else level
+                                            for level in counts.index.levels])
+    counts.columns = counts.columns.astype(object)
+    return counts.reindex(columns=counts.columns.union(OUTCOMES), fill_value=0)
+
+
+class CallAggregates:
+    """Outcome counters per Date, State and Time_Period, kept up to date.
+
+    `append(batch)` only counts the new rows and adds them to the counters,
+    so a refresh costs the size of the batch plus the number of distinct
+    dates, states and periods, never the full call history.
+    """
+
+    def __init__(self):
+        self.by_date = None
+        self.by_state = None
+        self.by_period = None
+        self.version = 0
+
+        self._views = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df):
+        calls = cls()
+        calls.append(df)
+        return calls
+
+    def append(self, batch):
+        if not isinstance(batch, pd.DataFrame):
+            batch = pd.DataFrame.from_records(batch)
+        if len(batch) == 0:
+            return
+        # whole days, as calls_schema.typed() stores them: one counter per date
+        batch = batch.assign(Date=pd.to_datetime(batch['Date']).dt.normalize())
+        if 'Hour' not in batch:
+            batch['Hour'] = hours(batch['Time_Period'])
+
+        counts = count_outcomes(batch)
+        deltas = [counts.groupby(level=level).sum() for level in LEVELS]
+
+        with self._lock:
+            self.by_date, self.by_state, self.by_period = [
+                delta if current is None
+                # a new date, state or period meeting an outcome the batch
+                # has none of is missing on both sides, so still NaN
+                else current.add(delta, fill_value=0).fillna(0).astype('int64')
+                for current, delta in zip((self.by_date, self.by_state, self.by_period),
+                                          deltas)]
+            self.version += 1
+            self._views = None
+
+    def views(self):
+        with self._lock:
+            if self._views is None:
+                self._views = views(self.by_date, self.by_state, self.by_period)
+            return self._views
+
+
+def views(by_date, by_state, by_period):
+    """Every dashboard view, derived from the outcome counters alone."""
+    by_date = by_date.copy()
+    by_date.insert(0, 'Total', by_date.sum(axis=1))
+    by_date = by_date[['Total'] + OUTCOMES].reset_index()
+
+    state_totals = by_state.sum(axis=1)
+    state_successes = by_state['Success']
+    # like the original .xs('Success'), states without a success are left out
+    state_successes = state_successes[state_successes > 0]
+
+    by_state_view = by_state.loc[state_successes.index, OUTCOMES].reset_index()
+
+    outcomes = by_state.sum().loc[lambda s: s > 0].sort_values(ascending=False)
+    outcomes.index.name = None
+
+    state_success = (state_successes / state_totals * 100).sort_values(ascending=False)
+
+    # one bar per start hour, in hour order, labelled with its period
+    periods = by_period['Success'].sort_index(level='Hour', sort_remaining=False)
+    hour = periods.index.get_level_values('Hour')
+    success_by_period = periods.groupby(hour).sum()
+    success_by_period.index = periods.index.get_level_values('Time_Period')[~hour.duplicated()]
+    success_by_period = success_by_period[success_by_period > 0]
+
+    return CallViews(by_date=by_date,
+                     by_state=by_state_view,
+                     outcomes=outcomes,
+                     state_success=state_success,
+                     state_totals=state_totals,
+                     state_successes=state_successes,
+                     success_by_period=success_by_period)
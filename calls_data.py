@@ -0,0 +1,129 @@
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from calls_schema import typed
+
+
+CALLS_FILE = os.environ.get('CALLS_FILE', 'assets/dashboard.xlsx')
+CACHE_DIR = os.environ.get('CALLS_CACHE_DIR', 'assets/.calls_cache')
+
+
+def load_calls(path=CALLS_FILE, cache_dir=CACHE_DIR):
+    """The `data` sheet of the calls workbook, with the types of calls_schema.py.
+
+    The first read goes through openpyxl and is written to `cache_dir` as
+    one .npy file per column; later reads memory-map those files as long
+    as the workbook has not changed.
+    """
+    meta = _read_meta(cache_dir)
+    if meta is not None and _matches(meta, path, cache_dir):
+        return typed(_read_columns(cache_dir, meta))
+
+    df = pd.read_excel(path, sheet_name='data', parse_dates=['Date'])
+    try:
+        _write_columns(df, path, cache_dir)
+    except OSError as e:
+        print(f'could not write calls cache {cache_dir}: {e}')
+    return typed(df)
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _matches(meta, path, cache_dir):
+    stat = os.stat(path)
+    source = meta['source']
+    if source['size'] != stat.st_size:
+        return False
+    if source['mtime_ns'] == stat.st_mtime_ns:
+        return True
+
+    # touched or checked out again: only the content hash can tell
+    if source['sha1'] != file_digest(path):
+        return False
+    source['mtime_ns'] = stat.st_mtime_ns
+    _write_meta(cache_dir, meta)
+    return True
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    tmp = os.path.join(cache_dir, f'meta.json.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(cache_dir, 'meta.json'))
+
+
+def _read_columns(cache_dir, meta):
+    folder = os.path.join(cache_dir, meta['generation'])
+    columns = {}
+    for col in meta['columns']:
+        values = np.load(os.path.join(folder, col['file']), mmap_mode='r')
+
+        if col['kind'] == 'strings':
+            # the stored codes are the categorical's codes, -1 for missing
+            columns[col['name']] = pd.Categorical.from_codes(values, col['categories'])
+        elif col['kind'] == 'datetime':
+            columns[col['name']] = values.view(col['dtype'])
+        else:
+            columns[col['name']] = values
+
+    return pd.DataFrame(columns)
+
+
+def _write_columns(df, path, cache_dir):
+    stat = os.stat(path)
+    source = {'size': stat.st_size,
+              'mtime_ns': stat.st_mtime_ns,
+              'sha1': file_digest(path)}
+
+    # files go into a fresh folder and meta.json is swapped in last,
+    # so a reader never mixes columns from two versions of the workbook
+    generation = source['sha1'][:16]
+    folder = os.path.join(cache_dir, generation)
+    os.makedirs(folder, exist_ok=True)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        col = {'name': name, 'file': f'{i}.npy'}
+
+        if series.dtype == object:
+            codes, categories = pd.factorize(series)
+            values = codes.astype(np.min_scalar_type(-len(categories) - 1))
+            col.update(kind='strings', categories=[str(c) for c in categories])
+        elif np.issubdtype(series.dtype, np.datetime64):
+            values = series.to_numpy().view('i8')
+            col.update(kind='datetime', dtype=str(series.dtype))
+        else:
+            values = series.to_numpy()
+            col.update(kind='numeric')
+
+        np.save(os.path.join(folder, col['file']), values)
+        columns.append(col)
+
+    _write_meta(cache_dir, {'source': source,
+                            'generation': generation,
+                            'columns': columns})
+
+    for entry in os.listdir(cache_dir):
+        stale = os.path.join(cache_dir, entry)
+        if entry != generation and os.path.isdir(stale):
+            shutil.rmtree(stale, ignore_errors=True)
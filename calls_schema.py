@@ -0,0 +1,86 @@
+"""Compact column types for the call log, and what each column costs.
+
+    python calls_schema.py [dashboard.xlsx]
+
+Text columns become categoricals (one small integer code per row), the
+start hour of `Time_Period` is parsed once per distinct period into an
+int8 `Hour` (calls_agg.py groups and sorts the periods by it) and dates
+are stored as days: date32 with pandas 2 and pyarrow, datetime64 otherwise.
+The command prints the memory per column as read and as typed.
+"""
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+CATEGORIES = ['Country', 'State', 'Time_Period', 'Outcome']
+
+# '9h00-10h00' -> 9
+HOUR = re.compile(r'^\s*(\d{1,2})h')
+
+
+def date_dtype():
+    # pandas < 2 turns every datetime64 into nanoseconds, date32 needs Arrow
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    if int(pd.__version__.split('.')[0]) < 2:
+        return None
+    return pd.ArrowDtype(pa.date32())
+
+
+def hours(time_periods):
+    """The start hour of every period as int8, -1 where it is missing or unreadable."""
+    periods = time_periods.astype('category')
+    per_category = [int(m.group(1)) if m else -1
+                    for m in map(HOUR.match, periods.cat.categories.astype(str))]
+    # code -1 (missing) picks the trailing -1
+    lookup = np.array(per_category + [-1], dtype=np.int8)
+    return pd.Series(lookup[periods.cat.codes.to_numpy()], index=time_periods.index, name='Hour')
+
+
+def typed(df):
+    """`df` with the compact types; columns it does not have are skipped."""
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if name in CATEGORIES and not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        elif name == 'Date':
+            series = pd.to_datetime(series).dt.normalize()
+            dtype = date_dtype()
+            if dtype is not None:
+                series = series.astype(dtype)
+        columns[name] = series
+
+    if 'Time_Period' in columns:
+        columns['Hour'] = hours(columns['Time_Period'])
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_report(df):
+    """Bytes per column (strings counted in full), with a total row."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str),
+                           'bytes': usage,
+                           'bytes_per_row': usage / max(len(df), 1)})
+    report.loc['total'] = ['', usage.sum(), usage.sum() / max(len(df), 1)]
+    return report
+
+
+if __name__ == '__main__':
+    from calls_data import CALLS_FILE
+
+    path = sys.argv[1] if len(sys.argv) > 1 else CALLS_FILE
+    raw = pd.read_excel(path, sheet_name='data', parse_dates=['Date'])
+    compact = typed(raw)
+
+    print(f'{len(raw)} calls in {path}\n\nas read:')
+    print(memory_report(raw).to_string(float_format='{:.1f}'.format))
+    print('\ntyped:')
+    print(memory_report(compact).to_string(float_format='{:.1f}'.format))
+    before, after = raw.memory_usage(deep=True).sum(), compact.memory_usage(deep=True).sum()
+    print(f'\n{before / after:.1f}x smaller')
@@ -0,0 +1,126 @@
+"""Read-only SQLite connections for concurrent callbacks, one per thread.
+
+    pool = ReadOnlyPool('assets/hr.db')
+    with pool.connection() as conn:
+        conn.execute(...)
+
+sqlite3 connections must not be shared between threads, so every thread
+opens its own on first use and keeps it, with its prepared statements,
+for the next query. Connections open the file with `mode=ro`: they never
+take a write lock, and under WAL (see hr_rollups.py) never wait for a
+writer either. A connection that failed is closed and reopened by the
+next query; failures are counted on /metrics and `health()` backs
+/healthz.
+"""
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+import metrics
+
+
+# bytes of the file read through mmap instead of read() calls
+MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+# page cache per connection, in KiB
+CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', 16 * 1024))
+# SQLITE_IMMUTABLE=1 skips all locking; only for a file nothing writes to
+IMMUTABLE = os.environ.get('SQLITE_IMMUTABLE', '0') == '1'
+
+pools = []
+
+
+class ReadOnlyPool:
+    """Per-thread read-only connections to `db_file`, opened on first use."""
+
+    def __init__(self, db_file, immutable=IMMUTABLE, mmap_size=MMAP_SIZE,
+                 cache_size=CACHE_SIZE):
+        self.db_file = db_file
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+
+        self.opened = 0
+        self.errors = 0
+        self.last_error = None
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        pools.append(self)
+
+    def uri(self):
+        uri = f'file:{quote(os.path.abspath(self.db_file))}?mode=ro'
+        if self.immutable:
+            uri += '&immutable=1'
+        return uri
+
+    def version(self):
+        """Changes whenever the data may have: the file, or its WAL, was written."""
+        return tuple(os.path.getmtime(path) if os.path.exists(path) else None
+                     for path in (self.db_file, self.db_file + '-wal'))
+
+    @contextmanager
+    def connection(self):
+        """This thread's connection; after an error it is closed and reopened next time."""
+        # pandas reports failed queries as its DatabaseError, an OSError
+        try:
+            connection = self._connection()
+            yield connection
+        except (sqlite3.Error, OSError) as e:
+            self._failed(e)
+            raise
+
+    def health(self):
+        """{'ok', 'db_file', 'opened', 'errors', 'last_error', ...} after a trivial query."""
+        start = time.perf_counter()
+        try:
+            with self.connection() as connection:
+                connection.execute('select count(*) from sqlite_master').fetchone()
+            ok = True
+        except (sqlite3.Error, OSError):
+            ok = False
+        return {'ok': ok,
+                'db_file': self.db_file,
+                'check_ms': round((time.perf_counter() - start) * 1000, 3),
+                'opened': self.opened,
+                'errors': self.errors,
+                'last_error': self.last_error}
+
+    def _connection(self):
+        # a replaced file (a new build) needs a new connection to be seen, and
+        # a forked process (a background job) must not touch its parent's
+        key = (os.stat(self.db_file).st_ino, os.getpid())
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.key == key:
+            return connection
+        if connection is not None and self._local.key[1] == key[1]:
+            connection.close()
+
+        connection = sqlite3.connect(self.uri(), uri=True)
+        connection.execute(f'pragma mmap_size = {int(self.mmap_size)}')
+        connection.execute(f'pragma cache_size = {-int(self.cache_size)}')
+        self._local.connection = connection
+        self._local.key = key
+        with self._lock:
+            self.opened += 1
+        return connection
+
+    def _failed(self, error):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None and self._local.key[1] == os.getpid():
+            connection.close()
+
+        with self._lock:
+            self.errors += 1
+            self.last_error = f'{type(error).__name__}: {error}'
+        metrics.registry.inc('dash_sqlite_errors_total', {'db': os.path.basename(self.db_file)})
+        print(f'{self.db_file}: {self.last_error}')
+
+
+def health():
+    """(all ok, [health() of every pool])."""
+    checks = [pool.health() for pool in pools]
+    return all(check['ok'] for check in checks), checks
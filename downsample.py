@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# most points a time series sends to the browser, whatever the date range
+MAX_POINTS = int(os.environ.get('PLOT_MAX_POINTS', 500))
+
+
+def lttb(x, y, n_out):
+    """Indices of the `n_out` points that keep the shape of y(x).
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept and
+    every bucket in between contributes the point forming the largest
+    triangle with the previous pick and the next bucket's average.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (n_out - 2)
+
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+
+    return picked
+
+
+def visible_range(relayout_data):
+    """The x range the user zoomed to, or None when the whole axis is shown."""
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    return None
+
+
+def downsample(df, x, y, x_range=None, max_points=MAX_POINTS):
+    """The rows of `df` inside `x_range`, thinned to `max_points` along `y`."""
+    if x_range is not None:
+        low, high = (pd.Timestamp(v) if np.issubdtype(df[x].dtype, np.datetime64) else v
+                     for v in x_range)
+        # one point either side, so the line runs on to the plot's edges
+        inside = np.flatnonzero(((df[x] >= low) & (df[x] <= high)).to_numpy())
+        if len(inside):
+            df = df.iloc[max(inside[0] - 1, 0):inside[-1] + 2]
+
+    if len(df) <= max_points:
+        return df
+
+    xs = df[x].to_numpy()
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = xs.astype('datetime64[ns]').astype('int64')
+    return df.iloc[lttb(xs, df[y].to_numpy(), max_points)]
@@ -0,0 +1,164 @@
+"""Entity relationship diagram of hr.db, read from the SQLite schema.
+
+    python erd.py [hr.db]
+
+Only the schema is read (sqlite_master and PRAGMAs), never any rows. The
+DOT source and, when Graphviz's `dot` is installed, the rendered PNG are
+written to ERD_CACHE_DIR under a hash of the schema, so a diagram is
+rendered once per schema and redrawn after it changes.
+"""
+import os
+import sys
+import hashlib
+import sqlite3
+import subprocess
+from shutil import which
+from contextlib import closing
+from urllib.parse import quote
+
+
+ERD_CACHE_DIR = os.environ.get('ERD_CACHE_DIR', 'assets/erd')
+
+# the pre-rendered diagram, used when Graphviz is not installed
+FALLBACK_IMAGE = 'assets/graph.png'
+
+# the HR tables; hr.db also holds unrelated exercise tables
+TABLES = ('regions', 'countries', 'locations', 'departments',
+          'employees', 'job_history', 'jobs')
+
+HEADER = '''digraph G {
+    graph [nodesep=0.5, rankdir="LR", concentrate=true, splines="spline",
+           fontname="Helvetica", pad="0.2,0.2", label=""];
+    node [shape=plain, fontname="Helvetica"];
+    edge [dir=both, fontsize=12, arrowsize=0.9, penwidth=1.0,
+          labelangle=32, labeldistance=1.8, fontname="Helvetica"];
+'''
+
+
+def schema(connection, tables=TABLES):
+    """{table: [(column, type, is_pk), ...]} in declaration order."""
+    if tables is None:
+        tables = [name for name, in connection.execute(
+            "select name from sqlite_master where type = 'table' "
+            "and name not like 'sqlite_%' order by name")]
+
+    columns = {}
+    for table in tables:
+        rows = connection.execute(f'pragma table_info("{table}")').fetchall()
+        # cid, name, type, notnull, default, pk
+        columns[table] = [(name, type_, pk > 0) for _, name, type_, _, _, pk in rows]
+    return columns
+
+
+def relations(connection, columns):
+    """(parent, parent_column, child, child_column) for every reference.
+
+    Declared foreign keys are used where a table has them. hr.db declares
+    none, so for the other tables a column named like another table's
+    single-column primary key (e.g. employees.job_id -> jobs.job_id) is
+    taken as a reference to it.
+    """
+    primary_keys = {}
+    for table, cols in columns.items():
+        pks = [name for name, _, is_pk in cols if is_pk]
+        if len(pks) == 1:
+            primary_keys.setdefault(pks[0], table)
+
+    found = []
+    for table, cols in columns.items():
+        # id, seq, table, from, to, on_update, on_delete, match
+        declared = connection.execute(f'pragma foreign_key_list("{table}")').fetchall()
+        if declared:
+            for row in declared:
+                parent, child_column, parent_column = row[2], row[3], row[4]
+                if parent in columns:
+                    found.append((parent, parent_column or child_column, table, child_column))
+            continue
+
+        for name, _, is_pk in cols:
+            parent = primary_keys.get(name)
+            if parent is not None and parent != table:
+                found.append((parent, name, table, name))
+    return found
+
+
+def schema_hash(connection, tables=TABLES):
+    """Short hash of the CREATE statements of `tables` (all tables if None)."""
+    rows = connection.execute(
+        "select name, sql from sqlite_master where type = 'table' order by name").fetchall()
+    digest = hashlib.sha1()
+    for name, sql in rows:
+        if tables is None or name in tables:
+            digest.update(f'{name}\0{sql}\0'.encode())
+    return digest.hexdigest()[:12]
+
+
+def to_dot(columns, refs):
+    lines = [HEADER]
+    for table, cols in columns.items():
+        rows = []
+        for name, type_, is_pk in cols:
+            label = f'<u>{name}</u>' if is_pk else name
+            rows.append(f'        <tr><td port="{name}" align="left" cellpadding="5">'
+                        f'{label} <font color="grey60">{type_.lower() or "any"}</font></td></tr>')
+        lines.append(f'    "{table}" [label=<\n'
+                     '        <table border="0" cellborder="1" cellspacing="0">\n'
+                     f'        <tr><td bgcolor="lightblue"><b>{table}</b></td></tr>\n'
+                     + '\n'.join(rows) + '\n'
+                     '        </table>>];\n')
+
+    # one parent row to many child rows
+    for parent, parent_column, child, child_column in refs:
+        lines.append(f'    "{parent}":"{parent_column}" -> "{child}":"{child_column}" '
+                     '[arrowhead=ocrow, arrowtail=none];')
+    lines.append('}\n')
+    return '\n'.join(lines)
+
+
+def render(dot_file, image_file):
+    """Renders with Graphviz; False when `dot` is missing or fails."""
+    if which('dot') is None:
+        return False
+    # workers may render the same schema at once, each into its own file
+    tmp_file = f'{image_file}.{os.getpid()}.tmp'
+    try:
+        subprocess.run(['dot', '-Tpng', dot_file, '-o', tmp_file],
+                       check=True, capture_output=True, timeout=60)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(e)
+        return False
+    os.replace(tmp_file, image_file)
+    return True
+
+
+def diagram(db_file, tables=TABLES, cache_dir=ERD_CACHE_DIR):
+    """Path of the ERD image for the current schema of `db_file`.
+
+    Reuses the files of an earlier call with the same schema; falls back
+    to FALLBACK_IMAGE when no image can be rendered.
+    """
+    # read-only: a wrong path fails instead of creating an empty database
+    uri = f'file:{quote(os.path.abspath(db_file))}?mode=ro'
+    with closing(sqlite3.connect(uri, uri=True)) as conn:
+        key = schema_hash(conn, tables)
+        dot_file = os.path.join(cache_dir, f'erd-{key}.dot')
+        image_file = os.path.join(cache_dir, f'erd-{key}.png')
+        if os.path.exists(image_file):
+            return image_file
+
+        if not os.path.exists(dot_file):
+            columns = schema(conn, tables)
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = f'{dot_file}.{os.getpid()}.tmp'
+            with open(tmp_file, 'w') as f:
+                f.write(to_dot(columns, relations(conn, columns)))
+            os.replace(tmp_file, dot_file)
+
+    if render(dot_file, image_file):
+        return image_file
+    return FALLBACK_IMAGE
+
+
+if __name__ == '__main__':
+    db_file = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('HR_DB_FILE', 'assets/hr.db')
+    print(diagram(db_file))
@@ -0,0 +1,377 @@
+"""Exports both dashboards as static files, served without any Python.
+
+    python export_static.py [--out dist]
+
+Every page of the app becomes an HTML file (`/` -> index.html, `/calls`
+-> calls/index.html) next to the JSON of its figures, plotly.js and
+assets/clientside.js. The sliders, date picker and group picker filter
+in the browser the way CLIENTSIDE_FILTERING=1 does: the full figure a
+graph is filtered from is fetched through the app's own callbacks, once
+per value of any other input (e.g. every department in the group
+picker), so every state of the page is in the bundle.
+
+The export scrapes nothing (PERCENTILE_OFFLINE=1 unless set otherwise),
+so the same data always gives the same files; without a percentile
+snapshot it stops, unless `--allow-empty` ships empty percentile lines. Serve the folder with any
+static server, e.g. `python -m http.server -d dist`; browsers do not
+fetch the figures of a page opened from disk.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+from html import escape
+
+from serving import walk
+
+# before the pages are imported: the full figures ship once, filtered in the browser
+os.environ['CLIENTSIDE_FILTERING'] = '1'
+os.environ['BACKGROUND_CALLBACKS'] = '0'
+os.environ.setdefault('PERCENTILE_OFFLINE', '1')
+
+
+OUT_DIR = 'dist'
+
+# the few bootstrap classes the layouts use; the bundle loads nothing from a CDN
+CSS = """
+body { margin: 0; font-family: system-ui, sans-serif; }
+.text-white { color: #fff; }
+.display-7 { font-weight: 300; }
+.nav-link { display: block; padding: .5rem 1rem; text-decoration: none; border-radius: .375rem; }
+.nav-link:hover { background: rgba(255, 255, 255, .1); }
+.static-control { display: flex; align-items: center; gap: 1rem; color: #fff; margin: 1rem 0; }
+.static-control input[type=range] { flex: 1; }
+"""
+
+# fetches the figures of the bound graphs and filters them with assets/clientside.js
+SCRIPT = """
+(function() {
+    var threshold = window.dash_clientside.filters.threshold;
+    var figures = {};
+
+    function fetchFigure(url) {
+        if (!figures[url]) {
+            figures[url] = fetch(url).then(function(r) { return r.json(); });
+        }
+        return figures[url];
+    }
+
+    function value(id) {
+        var el = document.getElementById(id);
+        if (!el.value) {
+            return null;
+        }
+        return el.type === 'range' ? parseFloat(el.value) : el.value;
+    }
+
+    document.querySelectorAll('[data-figure]').forEach(function(graph) {
+        fetchFigure(graph.dataset.figure).then(function(figure) {
+            Plotly.newPlot(graph, figure.data, figure.layout, {responsive: true});
+        });
+    });
+
+    document.querySelectorAll('input[type=range][data-marks]').forEach(function(slider) {
+        // a slider without a step only stops on its marks
+        var marks = JSON.parse(slider.dataset.marks);
+        slider.addEventListener('input', function() {
+            var v = parseFloat(slider.value);
+            slider.value = marks.reduce(function(a, b) {
+                return Math.abs(b - v) < Math.abs(a - v) ? b : a;
+            });
+        });
+    });
+
+    BINDINGS.forEach(function(binding) {
+        function draw() {
+            var url = binding.figures[binding.by ? value(binding.by) : ''];
+            fetchFigure(url).then(function(stored) {
+                var figure = threshold(value(binding.control), stored);
+                Plotly.react(binding.graph, figure.data, figure.layout, {responsive: true});
+            });
+        }
+        [binding.control, binding.by].forEach(function(id) {
+            if (id) {
+                document.getElementById(id).addEventListener('input', draw);
+                document.getElementById(id).addEventListener('change', draw);
+            }
+        });
+        draw();
+    });
+
+    document.querySelectorAll('input[type=range]').forEach(function(slider) {
+        var shown = document.querySelector('output[for="' + slider.id + '"]');
+        slider.addEventListener('input', function() { shown.value = slider.value; });
+    });
+})();
+"""
+
+# the filter of assets/clientside.js the bundle runs in place of the callbacks
+THRESHOLD = {'namespace': 'filters', 'function_name': 'threshold'}
+
+# html props that map onto an attribute of the same meaning
+ATTRIBUTES = {'id': 'id', 'className': 'class', 'href': 'href', 'src': 'src', 'alt': 'alt',
+              'width': 'width', 'height': 'height', 'title': 'title'}
+
+
+def page_file(path):
+    # '/' -> index.html, '/calls' -> calls/index.html
+    return os.path.join(path.strip('/'), 'index.html') if path.strip('/') else 'index.html'
+
+
+def style(props):
+    return '; '.join(f'{key}: {value}' for key, value in props.items())
+
+
+def attributes(pairs):
+    return ''.join(f' {name}="{escape(str(value))}"' for name, value in pairs
+                   if value is not None)
+
+
+class Exporter:
+    """Writes every page of `app` to `out_dir`, one page at a time."""
+
+    def __init__(self, app, out_dir):
+        self.out_dir = out_dir
+        self.client = app.server.test_client()
+        self.page_paths = {}
+
+    def export(self):
+        import dash
+
+        pages = list(dash.page_registry.values())
+        self.page_paths = {page['path']: page_file(page['path']) for page in pages}
+        written = [self.write_assets()]
+        for page in pages:
+            written.append(self.export_page(page))
+        return written
+
+    def write(self, name, content):
+        target = os.path.join(self.out_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return name
+
+    def write_assets(self):
+        from plotly.offline import get_plotlyjs
+
+        self.write('assets/plotly.min.js', get_plotlyjs())
+        self.copy(os.path.join('assets', 'clientside.js'))
+        return 'assets/'
+
+    def copy(self, path):
+        target = os.path.join(self.out_dir, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+
+    def export_page(self, page):
+        from theme import BACKGROUND
+
+        name = self.page_paths[page['path']]
+        self.root = '../' * name.count('/')
+        self.page = page
+        self.slug = page['path'].strip('/') or 'index'
+        self.figures = 0
+
+        layout = page['layout']() if callable(page['layout']) else page['layout']
+        bindings = self.bindings(layout)
+        self.bound = {binding['graph'] for binding in bindings}
+        body = self.render(layout)
+
+        self.write(name, f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{escape(page['title'])}</title>
+<style>{CSS}</style>
+</head>
+<body style="background: {BACKGROUND}">
+{body}
+<script src="{self.root}assets/plotly.min.js"></script>
+<script>window.dash_clientside = {{no_update: null}};</script>
+<script src="{self.root}assets/clientside.js"></script>
+<script>var BINDINGS = {json.dumps(bindings)};</script>
+<script>{SCRIPT}</script>
+</body>
+</html>
+""")
+        return name
+
+    def bindings(self, layout):
+        """Graphs filtered in the browser: [{graph, control, by, figures: {value of by: url}}].
+
+        Found in the callbacks the app sends the browser: a `filters.threshold`
+        clientside callback drawing a graph from a control and a store, and
+        the server callback filling that store.
+        """
+        components = {c.id: c for c in walk(layout) if getattr(c, 'id', None)}
+        callbacks = self.client.get('/_dash-dependencies').get_json()
+        # keyed by output, e.g. 'year-figure-store.data'
+        filling = {entry['output']: entry for entry in callbacks}
+
+        bindings = []
+        for entry in callbacks:
+            graph = entry['output'].split('.')[0]
+            if entry.get('clientside_function') != THRESHOLD or graph not in components:
+                continue
+            inputs = [f"{i['id']}.{i['property']}" for i in entry['inputs']]
+            control, store = inputs[0].split('.')[0], inputs[1]
+            filled_by = filling[store]
+            others = [i['id'] for i in filled_by['inputs'] if i['id'] != 'url']
+            by = others[0] if others else None
+            values = [option['value'] for option in components[by].options] if by else ['']
+
+            figures = {}
+            for value in values:
+                stored = self.call(filled_by, store, {by: value} if by else {})
+                figures[value] = self.figure_url(stored)
+            bindings.append({'graph': graph, 'control': control, 'by': by, 'figures': figures})
+        return bindings
+
+    def call(self, entry, output, values):
+        """The output of a server callback, through Dash's own endpoint."""
+        out_id, out_prop = output.split('.')
+        inputs = [{'id': i['id'], 'property': i['property'],
+                   'value': self.page['path'] if i['id'] == 'url' else values[i['id']]}
+                  for i in entry['inputs']]
+        response = self.client.post('/_dash-update-component', json={
+            'output': output,
+            'outputs': {'id': out_id, 'property': out_prop},
+            'inputs': inputs,
+            'changedPropIds': [f"{inputs[0]['id']}.{inputs[0]['property']}"]})
+        if response.status_code != 200:
+            raise RuntimeError(f'{output} failed: {response.data[:200]}')
+        return response.get_json()['response'][out_id][out_prop]
+
+    def figure_url(self, figure):
+        from plotly.io.json import to_json_plotly
+
+        name = f'figures/{self.slug}-{self.figures}.json'
+        self.figures += 1
+        self.write(name, to_json_plotly(figure))
+        return f'{self.root}{name}'
+
+    def render(self, component):
+        if component is None:
+            return ''
+        if isinstance(component, (list, tuple)):
+            return ''.join(self.render(child) for child in component)
+        if not hasattr(component, '_type'):
+            return escape(str(component))
+
+        render = getattr(self, f'render_{component._type}', None)
+        if render is not None:
+            return render(component)
+        if component._namespace == 'dash_html_components':
+            return self.render_html(component)
+        # anything else without its own renderer keeps only its children
+        return f'<div>{self.render(getattr(component, "children", None))}</div>'
+
+    def render_html(self, component, tag=None, extra=()):
+        tag = tag or component._type.lower()
+        props = component.to_plotly_json()['props']
+        pairs = [(ATTRIBUTES[key], value) for key, value in props.items() if key in ATTRIBUTES]
+        pairs = [(name, self.link(value) if name in ('href', 'src') else value)
+                 for name, value in pairs]
+        if props.get('style'):
+            pairs.append(('style', style(props['style'])))
+        pairs += list(extra)
+        if tag in ('img', 'br', 'hr'):
+            return f'<{tag}{attributes(pairs)}>'
+        return f'<{tag}{attributes(pairs)}>{self.render(props.get("children"))}</{tag}>'
+
+    def link(self, target):
+        # links to other pages and files of the app, relative to this page
+        if target in self.page_paths:
+            return self.root + self.page_paths[target]
+        if isinstance(target, str) and target.startswith('assets/') and os.path.exists(target):
+            self.copy(target)
+            return self.root + target
+        return target
+
+    def render_Graph(self, component):
+        graph_id = getattr(component, 'id', None)
+        pairs = [('id', graph_id)]
+        if getattr(component, 'style', None):
+            pairs.append(('style', style(component.style)))
+        if graph_id is None or graph_id not in self.bound:
+            pairs.append(('data-figure', self.figure_url(component.figure)))
+        return f'<div{attributes(pairs)}></div>'
+
+    def render_Slider(self, component):
+        marks = sorted(float(mark) for mark in (getattr(component, 'marks', None) or {}))
+        pairs = [('id', component.id), ('type', 'range'),
+                 ('min', component.min), ('max', component.max),
+                 ('step', getattr(component, 'step', None) or 'any'),
+                 ('value', getattr(component, 'value', None))]
+        if not getattr(component, 'step', None) and marks:
+            pairs.append(('data-marks', json.dumps(marks)))
+        return (f'<div class="static-control"><input{attributes(pairs)}>'
+                f'<output for="{escape(component.id)}">{escape(str(component.value))}</output></div>')
+
+    def render_Dropdown(self, component):
+        options = ''.join(
+            f'<option value="{escape(str(option["value"]))}"'
+            f'{" selected" if option["value"] == component.value else ""}>'
+            f'{escape(str(option["label"]))}</option>'
+            for option in component.options)
+        return f'<div class="static-control"><select id="{escape(component.id)}">{options}</select></div>'
+
+    def render_DatePickerSingle(self, component):
+        pairs = [('id', component.id), ('type', 'date'),
+                 ('min', str(getattr(component, 'min_date_allowed', ''))[:10] or None),
+                 ('max', str(getattr(component, 'max_date_allowed', ''))[:10] or None),
+                 ('style', 'margin-left: 45%')]
+        return f'<div class="static-control"><input{attributes(pairs)}></div>'
+
+    def render_Store(self, component):
+        return ''
+
+    def render_Location(self, component):
+        return ''
+
+    def render_Nav(self, component):
+        return self.render_html(component, 'nav')
+
+    def render_NavLink(self, component):
+        classes = ' '.join(filter(None, ['nav-link', getattr(component, 'className', None)]))
+        return (f'<a{attributes([("class", classes), ("href", self.link(component.href))])}>'
+                f'{self.render(component.children)}</a>')
+
+
+def missing_percentiles():
+    # the export scrapes nothing, so sources without a snapshot ship empty lines
+    import scraper
+    from pages.hr import percentile_cache
+
+    snapshot = percentile_cache.get()
+    return [source for source in scraper.SOURCES
+            if not any(snapshot.get(source, {}).values())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default=OUT_DIR, help='folder the files are written to')
+    parser.add_argument('--allow-empty', action='store_true',
+                        help='export even when sources have no percentile snapshot')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app
+
+    missing = missing_percentiles()
+    if missing and not args.allow_empty:
+        sys.exit(f'no percentile snapshot for {", ".join(missing)}: run build_data.py '
+                 f'without PERCENTILE_OFFLINE first, or pass --allow-empty')
+    if missing:
+        print(f'warning: the UK percentile lines of {", ".join(missing)} are empty',
+              file=sys.stderr)
+
+    for name in Exporter(app, args.out).export():
+        print(os.path.join(args.out, name))
+
+
+if __name__ == '__main__':
+    main()
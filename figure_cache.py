@@ -0,0 +1,115 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+
+import metrics
+
+
+FIGURE_CACHE_SIZE = int(os.environ.get('FIGURE_CACHE_SIZE', 128))
+
+# every cache given a name, reported on /metrics
+caches = {}
+
+
+class ResultCache:
+    """LRU cache of `build(state)` for callbacks with a small input domain.
+
+    `version()` identifies the data a result was built from; when the
+    version changes every cached result is dropped and rebuilt on demand.
+    Results are handed out as they are, callers must not modify them.
+    A cache with a `name` reports its `stats()` on /metrics.
+    """
+
+    def __init__(self, build, version=lambda: None, maxsize=FIGURE_CACHE_SIZE, name=None):
+        self.build = build
+        self.version = version
+        self.maxsize = maxsize
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._results = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        if name is not None:
+            caches[name] = self
+
+    def get(self, state):
+        return self._lookup(state)
+
+    def _lookup(self, state):
+        self._check_version()
+
+        with self._lock:
+            if state in self._results:
+                self._results.move_to_end(state)
+                self.hits += 1
+                return self._results[state]
+            self.misses += 1
+
+        # build outside the lock, concurrent misses just race to store it
+        result = self.encode(self.build(state))
+
+        with self._lock:
+            self._results[state] = result
+            self._results.move_to_end(state)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def encode(self, result):
+        return result
+
+    def warm(self, states):
+        for state in states:
+            self._lookup(state)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def stats(self):
+        return {'size': len(self._results),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
+
+    def _check_version(self):
+        version = self.version()
+        if version != self._version:
+            with self._lock:
+                self._results.clear()
+                self._version = version
+
+
+class FigureCache(ResultCache):
+    """LRU cache of serialized figures for callbacks with a small input domain.
+
+    `build(state)` makes the figure for one input value, or any plain
+    value such as the trace data of a partial update; it is stored as
+    JSON, so every `get` hands out a fresh copy.
+    """
+
+    def get(self, state):
+        return json.loads(self.get_json(state))
+
+    def get_json(self, state):
+        return self._lookup(state)
+
+    def encode(self, figure):
+        if hasattr(figure, 'to_json'):
+            return figure.to_json()
+        from plotly.io.json import to_json_plotly
+        return to_json_plotly(figure)
+
+
+def export_stats(registry):
+    for name, cache in caches.items():
+        for stat, value in cache.stats().items():
+            registry.set(f'dash_result_cache_{stat}', {'cache': name}, value)
+
+
+metrics.collectors.append(export_stats)
@@ -0,0 +1,15 @@
+#  read by gunicorn from the working directory, so the Procfile stays
+#  `web: gunicorn app:server`
+import gc
+
+
+# import app.py once in the master: the data, the cached figures and the
+# imported libraries are built a single time and shared copy-on-write by
+# every forked worker, instead of being rebuilt per worker
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # move everything built so far out of the collector's reach, so a gc
+    # pass in a worker does not write to (and so un-share) those pages
+    gc.freeze()
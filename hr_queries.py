@@ -0,0 +1,74 @@
+from hr_rollups import has_rollups
+
+
+#  regions, countries, jobs and job_history start with a copy of their
+#  header as a data row; every query below filters it out in SQL, unless
+#  hr_rollups.py removed it and added the rollup tables read instead
+JOB_COUNTS = """
+    select j.job_title, count(e.employee_id) as employee_id
+    from employees e
+    join jobs j on j.job_id = e.job_id
+    where j.job_id <> 'job_id'
+    group by j.job_title
+    order by j.job_title;
+"""
+
+SALARY_SPREAD = """
+    select job_title, max_salary - min_salary as diff_salary
+    from jobs
+    where job_id <> 'job_id'
+      and max_salary - min_salary >= ?
+    order by rowid;
+"""
+
+SALARY_SPREAD_RANGE = """
+    select min(max_salary - min_salary), max(max_salary - min_salary)
+    from jobs
+    where job_id <> 'job_id';
+"""
+
+AVERAGE_SALARY = "select avg(salary) from employees;"
+
+ROLLUP_QUERIES = {
+    JOB_COUNTS: """
+        select job_title, sum(employees) as employee_id
+        from job_rollup
+        group by job_title
+        having sum(employees) > 0
+        order by job_title;
+    """,
+    SALARY_SPREAD: """
+        select job_title, diff_salary
+        from job_rollup
+        where diff_salary >= ?
+        order by position;
+    """,
+    SALARY_SPREAD_RANGE: "select min(diff_salary), max(diff_salary) from job_rollup;",
+    AVERAGE_SALARY: "select salary_sum * 1.0 / salaries from salary_rollup;",
+}
+
+
+def query(connection, sql):
+    """`sql`, or its rollup version when the database has the rollup tables."""
+    return ROLLUP_QUERIES[sql] if has_rollups(connection) else sql
+
+
+def job_counts(connection):
+    """Number of employees per job title, as `job_title`, `employee_id`."""
+    import pandas as pd
+    return pd.read_sql_query(query(connection, JOB_COUNTS), connection)
+
+
+def salary_spread(connection, min_diff):
+    """Jobs whose max - min salary is at least `min_diff`."""
+    import pandas as pd
+    return pd.read_sql_query(query(connection, SALARY_SPREAD), connection, params=(min_diff,))
+
+
+def salary_spread_range(connection):
+    low, high = connection.execute(query(connection, SALARY_SPREAD_RANGE)).fetchone()
+    return low, high
+
+
+def average_salary(connection):
+    return connection.execute(query(connection, AVERAGE_SALARY)).fetchone()[0]
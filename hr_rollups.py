@@ -0,0 +1,153 @@
+"""Cleans hr.db and adds indexes and rollup tables for the HR dashboard.
+
+    python hr_rollups.py [hr.db]
+
+Removes the copies of the header that regions, countries, jobs and
+job_history carry as their first row, and exact duplicate rows; indexes
+the join keys; stores the dashboard's aggregates in rollup tables that
+triggers keep current on every insert, update and delete; and switches
+the file to WAL, so readers and writers do not block each other. The
+queries in hr_queries.py read the rollups when they exist, in time
+proportional to the number of jobs, whatever the number of employees.
+Running it again rebuilds everything.
+"""
+import os
+import sys
+import sqlite3
+from contextlib import closing
+
+from erd import TABLES
+
+
+# (table, column) of every join key that is not already a primary key
+INDEXES = [('countries', 'region_id'),
+           ('locations', 'country_id'),
+           ('departments', 'location_id'),
+           ('employees', 'job_id'),
+           ('employees', 'department_id'),
+           ('job_history', 'employee_id'),
+           ('job_history', 'job_id'),
+           ('job_history', 'department_id')]
+
+ROLLUP_TABLES = ('job_rollup', 'salary_rollup')
+
+TRIGGERS = ('employees_rollup_insert', 'employees_rollup_delete', 'employees_rollup_update',
+            'jobs_rollup_insert', 'jobs_rollup_delete', 'jobs_rollup_update')
+
+# per job: the title, its salary spread and how many employees hold it;
+# position keeps the order of jobs, which the spread chart follows
+ROLLUPS = [
+    """create table job_rollup(
+           job_id varchar(10) primary key not null,
+           job_title varchar(25) not null,
+           position integer not null,
+           diff_salary decimal,
+           employees integer not null)""",
+    "create index job_rollup_diff_salary on job_rollup(diff_salary)",
+    """insert into job_rollup
+       select j.job_id, j.job_title, j.rowid, j.max_salary - j.min_salary,
+              (select count(*) from employees e where e.job_id = j.job_id)
+       from jobs j""",
+
+    # count and sum of the salaries, for their average
+    """create table salary_rollup(
+           salaries integer not null,
+           salary_sum decimal not null)""",
+    "insert into salary_rollup select count(salary), coalesce(sum(salary), 0) from employees",
+
+    """create trigger employees_rollup_insert after insert on employees begin
+           update job_rollup set employees = employees + 1 where job_id = new.job_id;
+           update salary_rollup set salaries = salaries + (new.salary is not null),
+                                    salary_sum = salary_sum + coalesce(new.salary, 0);
+       end""",
+    """create trigger employees_rollup_delete after delete on employees begin
+           update job_rollup set employees = employees - 1 where job_id = old.job_id;
+           update salary_rollup set salaries = salaries - (old.salary is not null),
+                                    salary_sum = salary_sum - coalesce(old.salary, 0);
+       end""",
+    """create trigger employees_rollup_update after update of job_id, salary on employees begin
+           update job_rollup set employees = employees - 1 where job_id = old.job_id;
+           update job_rollup set employees = employees + 1 where job_id = new.job_id;
+           update salary_rollup
+           set salaries = salaries - (old.salary is not null) + (new.salary is not null),
+               salary_sum = salary_sum - coalesce(old.salary, 0) + coalesce(new.salary, 0);
+       end""",
+    """create trigger jobs_rollup_insert after insert on jobs begin
+           insert into job_rollup
+           values (new.job_id, new.job_title, new.rowid, new.max_salary - new.min_salary,
+                   (select count(*) from employees where job_id = new.job_id));
+       end""",
+    """create trigger jobs_rollup_delete after delete on jobs begin
+           delete from job_rollup where job_id = old.job_id;
+       end""",
+    """create trigger jobs_rollup_update after update on jobs begin
+           delete from job_rollup where job_id = old.job_id;
+           insert into job_rollup
+           values (new.job_id, new.job_title, new.rowid, new.max_salary - new.min_salary,
+                   (select count(*) from employees where job_id = new.job_id));
+       end""",
+]
+
+
+def columns(connection, table):
+    return [row[1] for row in connection.execute(f'pragma table_info("{table}")')]
+
+
+def deduplicate(connection, tables=TABLES):
+    """Deletes header copies and repeated rows; returns the number of rows deleted."""
+    deleted = 0
+    for table in tables:
+        names = columns(connection, table)
+        # e.g. ('REGION_ID', 'REGION_NAME') in regions
+        deleted += connection.execute(
+            f'delete from "{table}" where lower(cast("{names[0]}" as text)) = ?',
+            (names[0].lower(),)).rowcount
+
+        # job_history has no key that would keep a row from being added twice
+        quoted = ', '.join(f'"{name}"' for name in names)
+        deleted += connection.execute(
+            f'delete from "{table}" where rowid not in '
+            f'(select min(rowid) from "{table}" group by {quoted})').rowcount
+    return deleted
+
+
+def create_indexes(connection, indexes=INDEXES):
+    for table, column in indexes:
+        connection.execute(f'create index if not exists "{table}_{column}" '
+                           f'on "{table}"("{column}")')
+
+
+def has_rollups(connection):
+    found = connection.execute(
+        "select count(*) from sqlite_master where type = 'table' and name in (?, ?)",
+        ROLLUP_TABLES).fetchone()[0]
+    return found == len(ROLLUP_TABLES)
+
+
+def build(db_file):
+    """Cleans `db_file` and (re)creates its indexes, rollups and triggers."""
+    with closing(sqlite3.connect(db_file, isolation_level=None)) as connection:
+        # one transaction: readers see the old database or the finished one
+        connection.execute('begin immediate')
+        try:
+            for name in TRIGGERS:
+                connection.execute(f'drop trigger if exists {name}')
+            for name in ROLLUP_TABLES:
+                connection.execute(f'drop table if exists {name}')
+            deleted = deduplicate(connection)
+            create_indexes(connection)
+            for statement in ROLLUPS:
+                connection.execute(statement)
+        except Exception:
+            connection.execute('rollback')
+            raise
+        connection.execute('commit')
+        connection.execute('analyze')
+        # readers (db_pool.py) then never wait for the triggers' writes
+        connection.execute('pragma journal_mode = wal')
+    return deleted
+
+
+if __name__ == '__main__':
+    db_file = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('HR_DB_FILE', 'assets/hr.db')
+    print(f'{build(db_file)} duplicate rows removed from {db_file}')
@@ -0,0 +1,233 @@
+"""Callback and startup timings, served in Prometheus text format.
+
+    metrics.instrument(app)      # right after creating the Dash app
+    @metrics.callback(...)       # instead of dash.callback, in page modules
+    with metrics.phase('sql_load'):
+        ...
+
+Every process keeps its own numbers: behind gunicorn, /metrics reports
+the worker that happened to answer the scrape.
+"""
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+import dash
+import flask
+from dash.exceptions import PreventUpdate
+
+
+SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+HELP = {
+    'dash_callback_seconds': 'Time spent in a callback request, serialization included.',
+    'dash_callback_build_seconds': 'Time spent in the callback function building its output.',
+    'dash_callback_serialize_seconds': 'Time spent encoding the callback output as JSON.',
+    'dash_callback_response_bytes': 'Size of the JSON callback response.',
+    'dash_callback_errors_total': 'Callback requests that raised.',
+    'dash_startup_phase_seconds': 'Duration of the last run of each startup phase.',
+    'dash_sqlite_errors_total': 'SQLite connections or queries that failed.',
+    'dash_result_cache_size': 'Results held by a result or figure cache.',
+    'dash_result_cache_hits': 'Lookups a result or figure cache answered.',
+    'dash_result_cache_misses': 'Lookups a result or figure cache had to build.',
+    'dash_result_cache_evictions': 'Results a result or figure cache dropped for space.',
+}
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+        yield f'{name}_bucket{_labels(labels, le="+Inf")} {self.count}'
+        yield f'{name}_sum{_labels(labels)} {self.sum}'
+        yield f'{name}_count{_labels(labels)} {self.count}'
+
+
+class Registry:
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, labels, value, buckets=SECONDS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(buckets)
+            self.histograms[key].observe(value)
+
+    def inc(self, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def set(self, name, labels, value):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def render(self):
+        with self._lock:
+            series = ([('histogram', k, v) for k, v in self.histograms.items()]
+                      + [('counter', k, v) for k, v in self.counters.items()]
+                      + [('gauge', k, v) for k, v in self.gauges.items()])
+
+        lines, seen = [], set()
+        for kind, (name, labels), value in sorted(series, key=lambda s: s[1]):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# HELP {name} {HELP.get(name, name)}')
+                lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                lines.extend(value.lines(name, dict(labels)))
+            else:
+                lines.append(f'{name}{_labels(dict(labels))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+# called with the registry before every /metrics response, for numbers kept elsewhere
+collectors = []
+
+
+def _labels(labels, **extra):
+    labels = dict(labels, **extra)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+
+@contextmanager
+def phase(name, registry=registry):
+    """Times one startup phase, e.g. `with phase('sql_load'): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.set('dash_startup_phase_seconds', {'phase': name},
+                     time.perf_counter() - start)
+
+
+def timed_phase(name, registry=registry):
+    """Decorator version of `phase`, for work that reruns later (e.g. scrape)."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name, registry):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument(app, registry=registry, path='/metrics'):
+    """Times every server-side callback of `app` and serves `path`.
+
+    Call it before the callbacks are registered: the callback function is
+    timed on its own (build time) and the request handler around it
+    (total time and response size); serialization is the difference.
+    Page modules register theirs with `metrics.callback` instead.
+    """
+    register = app.callback
+    build_times = threading.local()
+
+    def callback(*args, **kwargs):
+        return _timed_callback(register(*args, **kwargs), app.callback_map,
+                               registry, build_times)
+
+    app.callback = callback
+
+    @app.server.route(path)
+    def metrics():
+        for collect in collectors:
+            collect(registry)
+        return flask.Response(registry.render(),
+                              mimetype='text/plain; version=0.0.4')
+
+    return app
+
+
+_page_build_times = threading.local()
+
+
+def callback(*args, **kwargs):
+    """`dash.callback`, timed like the callbacks of an instrumented app.
+
+    For page modules, which are imported while the app is created and
+    register their callbacks without it.
+    """
+    from dash._callback import GLOBAL_CALLBACK_MAP
+
+    return _timed_callback(dash.callback(*args, **kwargs), GLOBAL_CALLBACK_MAP,
+                           registry, _page_build_times)
+
+
+def _timed_callback(decorator, callback_map, registry, build_times):
+    def wrap(func):
+        name = func.__name__
+
+        @wraps(func)
+        def build(*func_args, **func_kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*func_args, **func_kwargs)
+            finally:
+                build_times.value = time.perf_counter() - start
+
+        decorator(build)
+        # Dash keeps the request handler under the last registered output
+        entry = callback_map[next(reversed(callback_map))]
+        entry['callback'] = _timed_handler(entry['callback'], name,
+                                           registry, build_times)
+        return func
+
+    return wrap
+
+
+def _timed_handler(handler, name, registry, build_times):
+    labels = {'callback': name}
+
+    @wraps(handler)
+    def timed(*args, **kwargs):
+        build_times.value = None
+        start = time.perf_counter()
+        try:
+            response = handler(*args, **kwargs)
+        except PreventUpdate:
+            raise
+        except Exception:
+            registry.inc('dash_callback_errors_total', labels)
+            raise
+        total = time.perf_counter() - start
+
+        registry.observe('dash_callback_seconds', labels, total)
+        if build_times.value is not None:
+            registry.observe('dash_callback_build_seconds', labels, build_times.value)
+            registry.observe('dash_callback_serialize_seconds', labels,
+                             total - build_times.value)
+        if isinstance(response, (str, bytes)):
+            registry.observe('dash_callback_response_bytes', labels,
+                             len(response), BYTES)
+        return response
+
+    return timed
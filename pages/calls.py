@@ -0,0 +1,473 @@
+import os
+import threading
+
+import dash
+from dash import dcc
+from dash import html
+from dash import Patch
+from dash import Input, Output, ClientsideFunction
+import dash_bootstrap_components as dbc
+
+# pandas, plotly and the call data are only imported once the page is requested
+import background
+import metrics
+import serving
+import theme
+from figure_cache import ResultCache
+
+
+# CLIENTSIDE_FILTERING=1 ships the full line plot once and filters it in the browser
+CLIENTSIDE_FILTERING = os.environ.get('CLIENTSIDE_FILTERING', '0') == '1'
+
+
+# the calls dashboard, served on /calls of the app in app.py
+dash.register_page(__name__, path='/calls', name='Calls', title='Calls Dashboard')
+
+
+# styling the sidebar
+SIDEBAR_STYLE = {
+    "position": "fixed",
+    "top": 0,
+    "left": 0,
+    "bottom": 0,
+    "width": "16rem",
+    "text-color": 'white',
+    "padding": "2rem 1rem",
+    "background-color": "#23395d",
+    "font-family": "Times",
+}
+
+
+# padding for the page content
+CONTENT_STYLE = {
+    "margin-left": "18rem",
+    "margin-right": "2rem",
+    "padding": "2rem 1rem",
+}
+
+
+_calls = None
+_calls_lock = threading.Lock()
+
+
+def calls():
+    """The call counters, loaded the first time the page is requested.
+
+    Read through openpyxl once, then memory-mapped from assets/.calls_cache;
+    only the counters per Date, State and Time_Period are kept, not the rows;
+    calls().append() adds new calls.
+    """
+    global _calls
+    if _calls is not None:
+        return _calls
+
+    from calls_agg import CallAggregates
+    from calls_data import load_calls
+
+    # the workbook takes seconds to read, concurrent first requests wait for one read
+    with _calls_lock:
+        if _calls is None:
+            with metrics.phase('excel_read'):
+                df = load_calls()
+            with metrics.phase('aggregate'):
+                _calls = CallAggregates.from_frame(df)
+    return _calls
+
+
+def calls_version():
+    return calls().version
+
+
+def calls_from(date):
+    """The per-date counters from `date` on, all of them for None."""
+    by_date = calls().views().by_date
+    if date is None:
+        return by_date
+    return by_date[by_date.Date >= date]
+
+
+# the filtered counters per picked date, dropped after calls().append()
+dates_from = ResultCache(calls_from, version=calls_version, name='dates_from')
+
+
+def date_key(date):
+    # the day only; None for no date and for any day up to the first one,
+    # which all select every date
+    if not date:
+        return None
+    day = str(date)[:10]
+    if day <= str(calls().views().by_date.Date.min())[:10]:
+        return None
+    return day
+
+
+def build_figures(views):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    #### b) Data
+    b_df = views.by_state
+
+    bar_graph = px.bar(data_frame=b_df,
+                       x='State',
+                       y=['Success', 'Failure'],
+                       barmode='group',
+                       labels = {'variable': '',
+                                 'value': 'Number of Calls'},
+                       template=theme.DARK)
+
+    bar_graph.update_layout(showlegend=True)
+
+    #### c)
+    c_df = views.outcomes
+
+    c_graph = px.pie(values=c_df,
+                       names=c_df.index,
+                       color_discrete_sequence=px.colors.sequential.Rainbow,
+                       template=theme.DARK)
+
+    c_graph.update_layout(showlegend=True)
+
+    #### d)
+    d_graph = go.Figure()
+
+    totac = views.state_totals
+    totsuc = views.state_successes
+
+    state_success = views.state_success
+
+    d_graph.add_trace(
+        go.Bar(
+            x=state_success.index,
+            y=state_success.values,
+            name="State success",
+            marker_color='orange',
+        )
+    )
+
+    d_graph["layout"]["xaxis"]["title"] = "State"
+    d_graph["layout"]["yaxis"]["title"] = "Success"
+    d_graph["layout"]["legend_title"] = "Legends"
+    d_graph['layout']['template'] = theme.DARK
+
+
+    #### e)
+    e_graph = go.Figure()
+
+    e_graph.add_trace(
+        go.Pie(
+            labels=totac.index,
+            values=totac.values,
+            textinfo="none",
+            name="total calls",
+            hole=0.6,
+        ),
+    )
+
+    e_graph.add_trace(
+        go.Pie(
+            labels=totsuc.index,
+            values=totsuc.values,
+            textinfo="none",
+            name="success calls",
+            hole=0.45,
+        ),
+    )
+    e_graph.data[0].domain = {"x": [0, 1], "y": [1, 1]}
+    e_graph.data[1].domain = {"x": [0, 1], "y": [0.22, 0.78]}
+    e_graph.update_traces(hoverinfo="label+percent+name")
+    e_graph["layout"]["legend_title"] = "Labels"
+    e_graph['layout']['template'] = theme.DARK
+
+
+    #### f)
+    x = views.success_by_period
+
+    f_graph = go.Figure()
+    f_graph.add_trace(
+        go.Bar(
+            x=x.index,
+            y=x.values,
+            name="Time Period",
+            marker_color='green',
+        )
+    )
+    f_graph["layout"]["xaxis"]["title"] = "Hours/Time"
+    f_graph["layout"]["yaxis"]["title"] = "Success calls"
+    f_graph['layout']['template'] = theme.DARK
+
+    return bar_graph, c_graph, d_graph, e_graph, f_graph
+
+
+# the static figures, rebuilt only after calls().append() changed the counters
+_figures = (None, None)
+
+
+def current_figures():
+    global _figures
+    version, figures = _figures
+    if version != calls().version:
+        version = calls().version
+        figures = build_figures(calls().views())
+        _figures = (version, figures)
+    return figures
+
+
+LINES = ['Total', 'Success', 'Failure']
+
+# uirevision while no date is picked; None would let Plotly reset the zoom
+ALL_DATES = 'all'
+
+
+def line_plot(df, uirevision=ALL_DATES):
+    import plotly.express as px
+
+    line_graph = px.line(data_frame = df,
+                     x = 'Date',
+                     y = LINES,
+                     labels = {'Date': '',
+                               'variable': '',
+                               'value': 'Number of Calls'})
+
+    # the same uirevision keeps the user's zoom when the data is swapped in
+    line_graph.update_layout(template=theme.DARK_SEABORN,
+                         uirevision=uirevision,
+                         showlegend=True,
+                         legend=dict(
+                             orientation="h",
+                             yanchor="bottom",
+                             y=1.02,
+                             xanchor="right",
+                             x=1,
+                             bordercolor="White",
+                             borderwidth=2))
+    return line_graph
+
+
+######################################################
+
+
+sidebar = html.Div(
+    [
+        html.H3("Menu", className="display-7 text-white"),
+        html.Hr(style={'color':'white'}),
+        html.Br(),
+        dbc.Nav(
+            [
+                dbc.NavLink("1) Graph as function of Time",
+                            href="#adesc",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+                
+                dbc.NavLink("2) Number of calls per State",
+                            href="#bdesc",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+                
+                dbc.NavLink("3) Failure/Success/TimeOut",
+                            href="#cdesc",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+                
+                dbc.NavLink("4) Most Successfull States",
+                            href="#ddesc",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+                
+                dbc.NavLink("5) Total Number of Actions",
+                            href="#edesc",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+                
+                dbc.NavLink("6) Successes by Time_Period",
+                            href="#fdesc",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+            ],
+            vertical=True,
+            pills=True,
+        ),
+        html.Hr(style={'color':'white'}),
+        dbc.NavLink("HR Dashboard",
+                    href="/",
+                    className="text-white"),
+    ],
+    style=SIDEBAR_STYLE,
+)
+
+
+header = html.Div(children=[html.H3("Calls Dashboard  📞"),html.H5("Analyze Successfull/Failed calls")],
+                  style={'border':"2px solid black",
+                         'margin': 'auto',
+                         'width':"100%",
+                         'padding':'10px',
+                         'margin-bottom':'50px',
+                         'text-align':"center",
+                         'background':"black",
+                         "border-radius": "25px",
+                         'color':'white',
+                         "word-wrap": "break-word",
+                         "font-family": "Times"})
+
+a_desc = html.H5("a) We want to see this data in a graph with a time series legend. Then we want to see in the same graph the ratio of success /total calls as a function of date.",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="adesc")
+
+b_desc = html.H5("b) We want to see another graph that presents the success and failure by State in the form of a bar graph.",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="bdesc")
+
+c_desc = html.H5("c) We want to see at the end which state was the most ' successful ' in share ratios.",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="cdesc")
+
+d_desc = html.H5("d) We want to see at the end which state was the most ' successful ' in share ratios.",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="ddesc")
+
+e_desc = html.H5("e) We also want to see a double piechart that displays the total number of actions/ State and number ofsuccess / state.",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="edesc")
+
+f_desc = html.H5("f) We want to know the number of succes by Time_Period.",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="fdesc")
+
+
+def content():
+    from downsample import downsample
+
+    # rebuilt after calls().append(), see layout below
+    bar_graph, c_graph, d_graph, e_graph, f_graph = current_figures()
+    df_dt_grouped = calls().views().by_date
+
+    return html.Div(id="page-content",
+                    children=[
+                        header,
+                        a_desc,
+                        # built once per layout; update_plot only patches its data
+                        dcc.Graph(id="line_plot",
+                                  figure=line_plot(downsample(df_dt_grouped, 'Date', 'Total'))),
+                        dcc.Store(id="line_plot_store"),
+                        html.Div(children=[dcc.DatePickerSingle(id='date_picker',
+                                                                min_date_allowed=df_dt_grouped.Date.min(),
+                                                                max_date_allowed=df_dt_grouped.Date.max(),
+                                                                placeholder="Date",
+                                                                display_format="DD/MM/YYYY")],
+                                 style={"margin-left":"45%",
+                                        "margin-top":"-40px"}),
+                        background.progress_bar("line_plot_progress"),
+
+                        html.Br(),
+
+                        b_desc,
+                        dcc.Graph(figure=bar_graph),
+
+                        html.Br(),
+
+                        c_desc,
+                        dcc.Graph(figure=c_graph),
+
+                        html.Br(),
+
+                        d_desc,
+                        dcc.Graph(figure=d_graph),
+
+                        html.Br(),
+
+                        e_desc,
+                        dcc.Graph(figure=e_graph),
+
+                        html.Br(),
+
+                        f_desc,
+                        dcc.Graph(figure=f_graph),
+
+                        ],
+                    style=CONTENT_STYLE)
+
+
+def page_layout():
+    return html.Div([
+        dcc.Location(id="url"),
+        sidebar,
+        content()
+    ], style={"background": theme.BACKGROUND})
+
+
+# built once per version of the counters, not on every visit
+layout = serving.cached_page(page_layout, version=calls_version)
+
+
+if CLIENTSIDE_FILTERING:
+    @metrics.callback(
+        Output("line_plot_store", "data"),
+        Input("url", "pathname"))
+    def store_plot(pathname):
+        from downsample import downsample
+
+        # every date, sent once per page load; the picker filters it in the browser
+        df = downsample(calls().views().by_date, 'Date', 'Total')
+        return {'axis': 'x', 'figure': line_plot(df)}
+
+    dash.clientside_callback(
+        ClientsideFunction(namespace='filters', function_name='threshold'),
+        Output("line_plot", "figure"),
+        Input("date_picker", "date"),
+        Input("line_plot_store", "data"))
+else:
+    # BACKGROUND_CALLBACKS=1 runs it as a job, see background.py
+    @metrics.callback(
+        Output(component_id="line_plot", component_property="figure"),
+        Input("date_picker", "date"),
+        Input("line_plot", "relayoutData"),
+        **background.options("line_plot_progress", version=calls_version))
+    @background.reports_progress
+    def update_plot(date, relayout_data=None, progress=background.no_progress):
+        from downsample import downsample, visible_range
+
+        # shared by every request for the same day, never modified
+        df = dates_from.get(date_key(date))
+        progress(30)
+
+        # at most PLOT_MAX_POINTS dates, re-fetched in more detail on zoom
+        df = downsample(df, 'Date', 'Total', visible_range(relayout_data))
+        progress(60)
+
+        # one trace per column, in line_plot's order
+        patch = Patch()
+        for i, column in enumerate(LINES):
+            patch['data'][i]['x'] = df.Date
+            patch['data'][i]['y'] = df[column]
+        patch['layout']['uirevision'] = date or ALL_DATES
+        return patch
+
+
+def preload():
+    """Everything the first request of the page would otherwise load."""
+    with metrics.phase('calls_figure_build'):
+        current_figures()
@@ -0,0 +1,550 @@
+import os
+from collections import namedtuple
+
+import background
+import erd
+import hr_queries
+import metrics
+import salary_sketches
+import serving
+import theme
+from db_pool import ReadOnlyPool
+from figure_cache import FigureCache, ResultCache
+from percentile_cache import PercentileCache
+import scraper
+
+
+db_file = os.environ.get('HR_DB_FILE', 'assets/hr.db')
+
+# CLIENTSIDE_FILTERING=1 ships the full slider figures once and filters them in the browser
+CLIENTSIDE_FILTERING = os.environ.get('CLIENTSIDE_FILTERING', '0') == '1'
+
+
+# callbacks run on the server's threads, each thread queries over its own connection
+pool = ReadOnlyPool(db_file)
+connect = pool.connection
+
+
+def db_version():
+    return pool.version()
+
+
+Summary = namedtuple('Summary', 'counted min_diff_salary max_diff_salary avg_salary')
+
+
+def load_summary(_):
+    #  aggregated in SQLite, only the result rows come back
+    with metrics.phase('sql_load'), connect() as connection:
+        return Summary(hr_queries.job_counts(connection),
+                       *hr_queries.salary_spread_range(connection),
+                       hr_queries.average_salary(connection))
+
+
+_summary = ResultCache(load_summary, version=db_version, maxsize=1, name='summary')
+
+
+def summary():
+    """The aggregates the page is built from, queried again when hr.db changes."""
+    return _summary.get(None)
+
+
+def load_sketches(_):
+    # stored by salary_sketches.py, or computed here from the employees
+    with metrics.phase('salary_sketches'), connect() as connection:
+        return salary_sketches.load(connection)
+
+
+_sketches = ResultCache(load_sketches, version=db_version, maxsize=1, name='salary_sketches')
+
+
+def sketches():
+    return _sketches.get(None)
+
+
+def draw_erd(_):
+    #  the diagram is drawn from the schema of hr.db (tables, columns and keys),
+    #  rendered with Graphviz once per schema; assets/graph.png without Graphviz
+    with metrics.phase('erd'):
+        return erd.diagram(db_file)
+
+
+# looked up again when hr.db changes, redrawn only when its schema did
+_erd_image = ResultCache(draw_erd, version=db_version, maxsize=1, name='erd_image')
+
+
+def erd_image():
+    return _erd_image.get(None)
+
+
+"""
+##EXERCISE 2
+"""
+import dash
+from dash import dcc
+from dash import html
+from dash import Patch
+from dash import Input, Output, ClientsideFunction
+import dash_bootstrap_components as dbc
+from plotly.colors import qualitative
+
+
+# the HR dashboard, served on / of the app in app.py; nothing below touches
+# hr.db until the page is first requested
+dash.register_page(__name__, path='/', name='HR', title='HR Dashboard')
+
+
+# styling the sidebar
+SIDEBAR_STYLE = {
+    "position": "fixed",
+    "top": 0,
+    "left": 0,
+    "bottom": 0,
+    "width": "16rem",
+    "text-color": 'white',
+    "padding": "2rem 1rem",
+    "background-color": "#23395d",
+    "font-family": "Times",
+}
+
+
+# padding for the page content
+CONTENT_STYLE = {
+    "margin-left": "18rem",
+    "margin-right": "2rem",
+    "padding": "2rem 1rem",
+}
+
+def build_bar_graph(_):
+    import plotly.express as px
+
+    with metrics.phase('static_figure_build'):
+        figure = px.bar(data_frame=summary().counted,
+                        x='job_title',
+                        y='employee_id',
+                        color='job_title',
+                        labels = {'job_title': 'Jobs',
+                                  'employee_id': 'Count'},
+                        template=theme.DARK)
+
+        figure.update_layout(showlegend=True)
+    return figure
+
+
+_bar_graph = ResultCache(build_bar_graph, version=db_version, maxsize=1, name='bar_graph')
+
+
+def bar_graph():
+    return _bar_graph.get(None)
+
+
+def salary_figure(selected_salary):
+    import plotly.express as px
+
+    with connect() as conn:
+        filtered_df = hr_queries.salary_spread(conn, selected_salary)
+
+    c_graph = px.bar(data_frame=filtered_df,
+                     y='job_title',
+                     x='diff_salary',
+                     height=700,
+                     orientation='h',
+                     labels = {'job_title': 'Jobs',
+                               'diff_salary': 'Difference in Salary'},
+                     color_discrete_sequence=["#029e78"],
+                     template=theme.DARK)
+
+    c_graph.update_layout(showlegend=True)
+    return c_graph
+
+
+def salary_trace(selected_salary):
+    # the only part of the figure a slider move changes
+    with connect() as conn:
+        filtered_df = hr_queries.salary_spread(conn, selected_salary)
+    return {'x': filtered_df.diff_salary.tolist(),
+            'y': filtered_df.job_title.tolist()}
+
+
+def salary_states():
+    # every salary-slider step plus its max; values only reachable through
+    # the slider's auto marks are cached on first use
+    low, high = int(summary().min_diff_salary), int(summary().max_diff_salary)
+    return list(range(low, high, 3000)) + [high]
+
+
+# whole figures for the layout skeleton and the clientside store,
+# trace data only for the slider callback
+salary_figures = FigureCache(salary_figure, version=db_version, name='salary_figures')
+salary_traces = FigureCache(salary_trace, version=db_version, name='salary_traces')
+
+
+year = (2020, 2021, 2022)
+
+# served from the on-disk snapshot, refreshed in the background when stale
+percentile_cache = PercentileCache(metrics.timed_phase('scrape')(scraper.scrape))
+
+# one colour per scraped source (SCRAPE_SOURCES), the first one as before
+SOURCE_COLORS = ["#30f216"] + qualitative.Plotly
+def percentile_lines(years):
+    """(name, colour, values per year) of every percentile line, source by source.
+
+    Every configured source gets its lines, empty until it was scraped,
+    so the number of traces never changes under the patched figure.
+    """
+    snapshot = percentile_cache.get()
+    lines = []
+    for n, source in enumerate(scraper.SOURCES):
+        percentiles = snapshot.get(source, {})
+        prefix = f'{source} ' if len(scraper.SOURCES) > 1 else ''
+        for i in scraper.PERCENTILES:
+            lines.append((f'{prefix}{i}th Percentile',
+                          SOURCE_COLORS[n % len(SOURCE_COLORS)],
+                          [percentiles.get(i, {}).get(y) for y in years]))
+    return lines
+
+
+def chart_years(selected_year):
+    """The years of the slider and those the scraped pages report, from `selected_year` on."""
+    scraped = {y for percentiles in percentile_cache.get().values()
+               for values in percentiles.values() for y in values}
+    return sorted(y for y in set(year) | scraped if y >= selected_year)
+
+
+# the group whose percentiles are drawn next to the UK ones, as 'kind:key'
+ALL_EMPLOYEES = f'{salary_sketches.ALL}:'
+OWN_COLOR = "#f2a516"
+
+
+def group_options():
+    options = [{'label': 'All employees', 'value': ALL_EMPLOYEES}]
+    for kind, title in (('department', 'Department'), ('job', 'Job')):
+        options += [{'label': f'{title}: {label}', 'value': f'{kind}:{key}'}
+                    for key, label in sketches().groups(kind)]
+    return options
+
+
+def own_percentile_lines(group, years):
+    """(name, colour, values) of our percentiles per year, from the salary sketches.
+
+    A year's values are those of the employees hired up to that year;
+    a group without any salaries gets empty lines.
+    """
+    kind, _, key = (group or ALL_EMPLOYEES).partition(':')
+    per_year = [sketches().quantiles(kind, key, up_to=int(y)) for y in years]
+    if any(values is None for values in per_year):
+        per_year = []
+    return [(f'Our {p}th Percentile', OWN_COLOR, [values[i] for values in per_year])
+            for i, p in enumerate(salary_sketches.QUANTILES)]
+
+
+def year_figure(state):
+    import plotly.graph_objects as go
+
+    selected_year, group = state
+    filtered = chart_years(selected_year)
+    avg_salary = summary().avg_salary
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=filtered,
+                             y=[avg_salary for i in filtered],
+                             name='Average Salary',
+                             line=dict(color="black")))
+
+    for name, color, values in own_percentile_lines(group, filtered):
+        fig.add_trace(go.Scatter(x=filtered,
+                                 y=values,
+                                 name=name,
+                                 line=dict(color=color, dash='dash')))
+
+    for name, color, values in percentile_lines(filtered):
+        fig.add_trace(go.Scatter(x=filtered,
+                                 y=values,
+                                 name=name,
+                                 line=dict(color=color)))
+
+    fig["layout"]["legend_title"] = "Labels"
+    fig['layout']['template'] = theme.DARK
+    fig['layout']['xaxis']['tickvals'] = filtered
+    fig['layout']['xaxis']['ticktext'] = list(map(str, list(filtered)))
+    
+    return fig
+
+
+def year_traces(state):
+    # same traces, in the same order, as year_figure
+    selected_year, group = state
+    filtered = chart_years(selected_year)
+    avg_salary = summary().avg_salary
+
+    return {'x': filtered,
+            'y': ([[avg_salary for i in filtered]]
+                  + [values for _, _, values in own_percentile_lines(group, filtered)]
+                  + [values for _, _, values in percentile_lines(filtered)]),
+            'ticktext': list(map(str, list(filtered)))}
+
+
+def year_version():
+    # rebuilt whenever a fresh percentile snapshot is loaded
+    return db_version(), percentile_cache.version()
+
+
+year_figures = FigureCache(year_figure, version=year_version, name='year_figures')
+year_trace_data = FigureCache(year_traces, version=year_version, name='year_traces')
+
+
+sidebar = html.Div(
+    [
+        html.H3("Contents", className="display-7 text-white"),
+        html.Hr(style={'color':'white'}),
+        html.Br(),
+        dbc.Nav(
+            [
+                dbc.NavLink("EXERCISE 1",
+                            href="#erd",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+
+                dbc.NavLink("EXERCISE 2",
+                            href="#exer2",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+
+                dbc.NavLink("EXERCISE 3",
+                            href="#exer3",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+
+                dbc.NavLink("EXERCISE 4",
+                            href="#exer4",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+
+                dbc.NavLink("EXERCISE 5",
+                            href="#exer5",
+                            active="exact",
+                            className="text-white",
+                            external_link=True),
+            ],
+            vertical=True,
+            pills=True,
+        ),
+        html.Hr(style={'color':'white'}),
+        dbc.NavLink("Calls Dashboard",
+                    href="/calls",
+                    className="text-white"),
+    ],
+    style=SIDEBAR_STYLE,
+)
+
+header = html.Div(children=[html.H3("Final Exam"),html.H5("Shakhansho Sabzaliev")],
+                  style={'border':"2px solid black",
+                         'margin': 'auto',
+                         'width':"100%",
+                         'padding':'10px',
+                         'margin-bottom':'50px',
+                         'text-align':"center",
+                         'background':"black",
+                         "border-radius": "25px",
+                         'color':'white',
+                         "word-wrap": "break-word",
+                         "font-family": "Times"})
+
+a_desc = html.H5("Entity Relationship Diagram of the Database",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="erd")
+
+b_desc = html.H5("The number of employees with the same job.",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="exer2")
+
+c_desc = html.H5("Difference between the job MIN & MAX salaries",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="exer3")
+
+d_desc = html.H5("Average Employee Salary, our 10th, 25th, 75th and 90th Percentile and 10th, 25th, 50th, 75th and 90th Percentile for Salaries in UK",
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'left'},
+                 id="exer4")
+
+e_desc = html.H5([html.Br(),
+                  html.Br(),
+                  html.Br(),
+                  html.Hr(),
+                  "Dashboard Deployed Successfully!",
+                  html.Br(),
+                  "Thank you for the Course",
+                  html.Br(),
+                  "Learned a lot"],
+                style={'color':'white',
+                       'font-family':'Times',
+                       'margin-bottom':'0px',
+                       'text-align':'center'},
+                 id="exer5")
+
+
+def content():
+    low, high = summary().min_diff_salary, summary().max_diff_salary
+
+    return html.Div(id="page-content",
+                   children=[
+                       header,
+                       
+                       a_desc,
+                       html.P([html.Img(src=erd_image(), alt='image', width="80%")], style={'text-align':'center'}),
+                       
+                       html.Br(),
+                       html.Br(),
+
+                       b_desc,
+                       dcc.Graph(figure=bar_graph()),
+
+                       html.Br(),
+
+                       c_desc,
+                       # built once; the callbacks below only patch its data
+                       dcc.Graph(id='graph-with-slider',
+                                 figure=salary_figures.get(salary_states()[0])),
+                       dcc.Store(id='salary-figure-store'),
+                       dcc.Slider(
+                           low,
+                           high,
+                           step=3000,
+                           value=low,
+                           id='salary-slider'
+                           ),
+                       background.progress_bar('salary-progress'),
+
+                       html.Br(),
+
+                       d_desc,
+                       dcc.Dropdown(options=group_options(),
+                                    value=ALL_EMPLOYEES,
+                                    clearable=False,
+                                    id='salary-group'),
+                       dcc.Graph(id='graph-year-slider',
+                                 figure=year_figures.get((min(year), ALL_EMPLOYEES))),
+                       dcc.Store(id='year-figure-store'),
+                       dcc.Slider(
+                           2020,
+                           2022,
+                           step=None,
+                           value=2020,
+                           marks={str(y): str(y) for y in [2020, 2021, 2022]},
+                           id='year-slider'
+                           ),
+                       background.progress_bar('year-progress'),
+
+                       html.Br(),
+
+                       e_desc,
+                       
+                       ],
+                   style=CONTENT_STYLE)
+
+
+def page_layout():
+    return html.Div([dcc.Location(id="url"),
+                     sidebar,
+                     content()],
+                    style={"background": theme.BACKGROUND})
+
+
+# built once per version of hr.db and of the percentile snapshot
+layout = serving.cached_page(page_layout, version=year_version)
+
+
+if CLIENTSIDE_FILTERING:
+    @metrics.callback(
+        Output('salary-figure-store', 'data'),
+        Input('url', 'pathname'))
+    def store_salary_figure(pathname):
+        # every job, sent once per page load; the slider filters it in the browser
+        return {'axis': 'x', 'figure': salary_figures.get(salary_states()[0])}
+
+    dash.clientside_callback(
+        ClientsideFunction(namespace='filters', function_name='threshold'),
+        Output('graph-with-slider', 'figure'),
+        Input('salary-slider', 'value'),
+        Input('salary-figure-store', 'data'))
+else:
+    # BACKGROUND_CALLBACKS=1 runs it as a job, see background.py
+    @metrics.callback(
+        Output('graph-with-slider', 'figure'),
+        Input('salary-slider', 'value'),
+        **background.options('salary-progress', version=db_version))
+    @background.reports_progress
+    def update_figure(selected_salary, progress=background.no_progress):
+        # only the bars change, the skeleton in the layout keeps the rest
+        trace = salary_traces.get(selected_salary)
+        progress(50)
+        patch = Patch()
+        patch['data'][0]['x'] = trace['x']
+        patch['data'][0]['y'] = trace['y']
+        return patch
+
+
+if CLIENTSIDE_FILTERING:
+    @metrics.callback(
+        Output('year-figure-store', 'data'),
+        Input('url', 'pathname'),
+        Input('salary-group', 'value'))
+    def store_year_figure(pathname, group):
+        percentile_cache.get()
+        return {'axis': 'x', 'figure': year_figures.get((min(year), group))}
+
+    dash.clientside_callback(
+        ClientsideFunction(namespace='filters', function_name='threshold'),
+        Output('graph-year-slider', 'figure'),
+        Input('year-slider', 'value'),
+        Input('year-figure-store', 'data'))
+else:
+    @metrics.callback(
+        Output('graph-year-slider', 'figure'),
+        Input('year-slider', 'value'),
+        Input('salary-group', 'value'),
+        **background.options('year-progress', version=year_version))
+    @background.reports_progress
+    def update_figure2(selected_year, group, progress=background.no_progress):
+        # picks up a newer snapshot first, so the version check below sees it
+        percentile_cache.get()
+        progress(30)
+        traces = year_trace_data.get((selected_year, group))
+        progress(60)
+
+        patch = Patch()
+        for i, y in enumerate(traces['y']):
+            patch['data'][i]['x'] = traces['x']
+            patch['data'][i]['y'] = y
+        patch['layout']['xaxis']['tickvals'] = traces['x']
+        patch['layout']['xaxis']['ticktext'] = traces['ticktext']
+        return patch
+
+
+def preload():
+    """Everything the first request of the page would otherwise load."""
+    summary()
+    erd_image()
+    bar_graph()
+    with metrics.phase('salary_figure_warm'):
+        salary_figures.warm(salary_states()[:1])
+        salary_traces.warm(salary_states())
+    percentile_cache.get()
+    sketches()
+    with metrics.phase('year_figure_warm'):
+        year_figures.warm([(min(year), ALL_EMPLOYEES)])
+        year_trace_data.warm([(y, ALL_EMPLOYEES) for y in year])
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import threading
+
+
+# where the last good scrape is kept, and for how long it counts as fresh;
+# it is not committed, so a fresh checkout draws empty lines until a scrape
+CACHE_FILE = os.environ.get('PERCENTILE_CACHE_FILE', 'assets/percentiles.json')
+CACHE_TTL = int(os.environ.get('PERCENTILE_CACHE_TTL', 24 * 60 * 60))
+
+# PERCENTILE_OFFLINE=1 never touches the network, only the snapshot on disk
+OFFLINE = os.environ.get('PERCENTILE_OFFLINE', '0') == '1'
+
+# after a failed scrape, wait this long before trying the site again
+RETRY_AFTER = 5 * 60
+
+# {source: {percentile: {year: salary}}}
+EMPTY = {}
+
+# snapshots written before there were several sources hold this one page
+LEGACY_SOURCE = 'uk/sqlite'
+
+
+class PercentileCache:
+    """Serves scraped percentiles from disk and refreshes them in the background.
+
+    `get()` never waits on the network: a stale snapshot is returned as is
+    while a daemon thread fetches a new one (stale-while-revalidate).
+    """
+
+    def __init__(self, fetch, path=CACHE_FILE, ttl=CACHE_TTL, offline=OFFLINE):
+        self.fetch = fetch
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+
+        self._data = None
+        self._fetched_at = 0
+        self._attempted_at = 0
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get(self):
+        self._load()
+        if not self.offline and self.is_stale():
+            self.refresh_async()
+        return self._data if self._data is not None else EMPTY
+
+    def version(self):
+        # changes whenever a new snapshot is loaded, for downstream caches
+        return self._fetched_at
+
+    def is_stale(self):
+        return time.time() - self._fetched_at > self.ttl
+
+    def refresh(self):
+        # another worker may have refreshed the file while we were waiting
+        self._load()
+        if not self.is_stale():
+            return self._data
+
+        try:
+            data = self.fetch()
+        except Exception as e:
+            print(f'percentile refresh failed, serving last snapshot: {e}')
+            return self._data
+
+        # a source whose page failed this time keeps its last good values
+        data = {**(self._data or EMPTY), **_int_keys(data)}
+        self._save(data)
+        return data
+
+    def refresh_async(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if time.time() - self._attempted_at < RETRY_AFTER:
+                return
+            self._attempted_at = time.time()
+            self._thread = threading.Thread(target=self.refresh,
+                                            name='percentile-refresh',
+                                            daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f'could not read percentile snapshot {self.path}: {e}')
+            return
+
+        self._data = _int_keys(snapshot['percentiles'])
+        self._fetched_at = snapshot['fetched_at']
+        self._mtime = mtime
+
+    def _save(self, data):
+        snapshot = {'fetched_at': time.time(), 'percentiles': data}
+
+        # write next to the target and rename, so readers never see half a file
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, self.path)
+
+        self._data = _int_keys(data)
+        self._fetched_at = snapshot['fetched_at']
+        self._mtime = os.path.getmtime(self.path)
+
+
+def _int_keys(data):
+    # json turns the int percentile and year keys into strings
+    if all(str(k).isdigit() for k in data) and data:
+        data = {LEGACY_SOURCE: data}
+    return {source: {int(k): _years(v) for k, v in percentiles.items()}
+            for source, percentiles in data.items()}
+
+
+def _years(values):
+    # snapshots written before the years were parsed hold bare lists, whose
+    # columns cannot be placed on a year; they count as not scraped
+    if isinstance(values, list):
+        return {}
+    return {int(y): v for y, v in values.items()}
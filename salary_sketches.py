@@ -0,0 +1,370 @@
+"""Mergeable salary quantile sketches per department, job and year.
+
+    python salary_sketches.py [hr.db] [--rebuild] [--check]
+
+Every employee's salary goes into one t-digest per (department, year),
+(job, year) and (company, year), the year being the one they were hired.
+Only current employees count: job_history has no salaries, and an
+employee's current salary says nothing about a job they held before. A
+t-digest keeps about COMPRESSION weighted centroids however many
+salaries went in, and two of them merge into one, so a department's
+sketch over several years, or the company's over every department, is a
+merge of stored ones instead of a pass over the employees.
+
+The sketches are stored in hr.db next to the rollups of hr_rollups.py.
+Running this again only adds the employees inserted since the last run,
+and rebuilds everything when some were deleted; `--rebuild` also picks
+up salaries changed in place. `--check` compares every sketch with the
+exact percentiles of its group. Without the tables, `load` computes the
+sketches in memory from the database it reads.
+"""
+import os
+import sys
+import sqlite3
+import threading
+from contextlib import closing
+
+
+# centroids kept per sketch: more is more exact, bigger and slower to merge
+COMPRESSION = 200
+
+# percentiles compared with the scraped UK ones
+QUANTILES = (10, 25, 75, 90)
+
+# rows read from hr.db at a time while building
+CHUNK = 100_000
+
+ALL = 'all'
+KINDS = (ALL, 'department', 'job')
+
+TABLES = ('salary_sketches', 'salary_sketch_state')
+
+SCHEMA = [
+    """create table if not exists salary_sketches(
+           kind text not null,
+           key text not null,
+           year integer not null,
+           label text,
+           count real not null,
+           min real not null,
+           max real not null,
+           means blob not null,
+           weights blob not null,
+           primary key (kind, key, year))""",
+    # how far into employees the sketches have read
+    """create table if not exists salary_sketch_state(
+           source text primary key not null,
+           last_rowid integer not null,
+           rows integer not null)""",
+]
+
+# (source, its rows after a rowid): department, its name, job, its title,
+# the year of hire, the salary and the row's rowid
+SALARIES = {
+    'employees': """
+        select e.department_id, d.depart_name, e.job_id, j.job_title,
+               cast(substr(e.hire_date, 1, 4) as integer), e.salary, e.rowid
+        from employees e
+        left join departments d on d.department_id = e.department_id
+        left join jobs j on j.job_id = e.job_id
+        where e.rowid > ? and e.salary is not null
+        order by e.rowid""",
+}
+
+
+def _scale(q, compression):
+    # numpy is imported where it is used, so that importing the constants
+    # (pages/hr.py does) does not load it
+    import numpy as np
+
+    # t-digest's k1 scale: clusters are small near the tails, large in the middle
+    return compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0, 1) - 1)
+
+
+class TDigest:
+    """A t-digest: weighted centroids sorted by mean, plus the exact min and max.
+
+    Up to `compression` values are kept exactly, so small groups answer
+    exactly too.
+    """
+
+    __slots__ = ('means', 'weights', 'min', 'max', 'compression')
+
+    def __init__(self, means, weights, min, max, compression=COMPRESSION):
+        self.means = means
+        self.weights = weights
+        self.min = min
+        self.max = max
+        self.compression = compression
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    @classmethod
+    def from_values(cls, values, compression=COMPRESSION):
+        import numpy as np
+
+        values = np.sort(np.asarray(values, dtype=np.float64))
+        return cls._compressed(values, np.ones(len(values)), compression)
+
+    @classmethod
+    def merge(cls, digests, compression=COMPRESSION):
+        """One digest of everything in `digests`; None when there are none."""
+        import numpy as np
+
+        digests = [d for d in digests if d is not None and len(d.means)]
+        if not digests:
+            return None
+        if len(digests) == 1:
+            return digests[0]
+        means = np.concatenate([d.means for d in digests])
+        weights = np.concatenate([d.weights for d in digests])
+        order = np.argsort(means, kind='stable')
+        return cls._compressed(means[order], weights[order], compression,
+                               min(d.min for d in digests), max(d.max for d in digests))
+
+    @classmethod
+    def _compressed(cls, means, weights, compression, low=None, high=None):
+        import numpy as np
+
+        if len(means) == 0:
+            return None
+        low = means[0] if low is None else low
+        high = means[-1] if high is None else high
+        if len(means) > compression:
+            # a centroid per unit of the scale, by where its weight starts
+            total = weights.sum()
+            start = (np.cumsum(weights) - weights) / total
+            clusters = np.floor(_scale(start, compression) - _scale(0, compression)).astype(np.int64)
+            weighted = np.bincount(clusters, weights=means * weights)
+            weights = np.bincount(clusters, weights=weights)
+            kept = weights > 0
+            means, weights = weighted[kept] / weights[kept], weights[kept]
+        return cls(means, weights, float(low), float(high), compression)
+
+    def quantiles(self, percentiles=QUANTILES):
+        """The `percentiles` (0-100), interpolated like numpy's default 'linear'."""
+        import numpy as np
+
+        n = self.count
+        # centroid i covers ranks around its centre, cumulative weight - weight / 2
+        centres = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.concatenate([[0.5], centres, [n - 0.5]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        wanted = 0.5 + np.asarray(percentiles, dtype=np.float64) / 100 * (n - 1)
+        return np.interp(wanted, ranks, values).tolist()
+
+    def to_row(self):
+        return (self.count, self.min, self.max,
+                self.means.astype('<f8').tobytes(), self.weights.astype('<f8').tobytes())
+
+    @classmethod
+    def from_row(cls, count, low, high, means, weights, compression=COMPRESSION):
+        import numpy as np
+
+        return cls(np.frombuffer(means, dtype='<f8'), np.frombuffer(weights, dtype='<f8'),
+                   low, high, compression)
+
+
+def group_keys(row):
+    """(kind, key, label) of every group one employee counts in."""
+    department, depart_name, job, job_title = row[:4]
+    keys = [(ALL, '', 'All employees')]
+    if department is not None:
+        keys.append(('department', str(department), depart_name or str(department)))
+    if job is not None:
+        keys.append(('job', str(job), job_title or str(job)))
+    return keys
+
+
+def sketch_rows(rows, compression=COMPRESSION):
+    """{(kind, key, year): (label, digest)} of one batch of SALARIES rows."""
+    salaries = {}
+    for row in rows:
+        year, salary = row[4], row[5]
+        if year is None:
+            continue
+        for kind, key, label in group_keys(row):
+            salaries.setdefault((kind, key, year), (label, []))[1].append(salary)
+    return {group: (label, TDigest.from_values(values, compression))
+            for group, (label, values) in salaries.items()}
+
+
+def merge_into(sketches, batch):
+    for group, (label, digest) in batch.items():
+        if group in sketches:
+            digest = TDigest.merge([sketches[group][1], digest], digest.compression)
+        sketches[group] = (label, digest)
+
+
+def read_salaries(connection, after=None, chunk=CHUNK):
+    """Sketches of the rows after the given rowids, and how far each source was read.
+
+    `after` maps a source to the last rowid already counted.
+    """
+    after = after or {}
+    sketches, read = {}, {}
+    for source, sql in SALARIES.items():
+        last_rowid = after.get(source, 0)
+        cursor = connection.execute(sql, (last_rowid,))
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            merge_into(sketches, sketch_rows(rows))
+            last_rowid = rows[-1][-1]
+        read[source] = last_rowid
+    return sketches, read
+
+
+def has_sketches(connection):
+    found = connection.execute(
+        "select count(*) from sqlite_master where type = 'table' and name in (?, ?)",
+        TABLES).fetchone()[0]
+    return found == len(TABLES)
+
+
+def _row_counts(connection, state):
+    # rows up to the stored rowid; fewer than when stored means some were deleted
+    return {source: connection.execute(f'select count(*) from "{source}" where rowid <= ?',
+                                       (last_rowid,)).fetchone()[0]
+            for source, (last_rowid, _) in state.items()}
+
+
+def build(db_file, rebuild=False):
+    """Adds the employees inserted since the last build; returns the number of sketches written."""
+    with closing(sqlite3.connect(db_file, isolation_level=None)) as connection:
+        connection.execute('begin immediate')
+        try:
+            for statement in SCHEMA:
+                connection.execute(statement)
+            state = {source: (last_rowid, rows) for source, last_rowid, rows
+                     in connection.execute('select * from salary_sketch_state')}
+            counts = _row_counts(connection, state)
+            # sketches of other sources, e.g. job_history before, start over too
+            if (rebuild or set(state) - set(SALARIES)
+                    or any(counts[source] != rows for source, (_, rows) in state.items())):
+                connection.execute('delete from salary_sketches')
+                connection.execute('delete from salary_sketch_state')
+                state = {}
+
+            batch, read = read_salaries(
+                connection, {source: last_rowid for source, (last_rowid, _) in state.items()})
+            sketches = _read_table(connection, groups=batch.keys())
+            merge_into(sketches, batch)
+
+            connection.executemany(
+                'insert or replace into salary_sketches values (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(kind, key, year, label, *digest.to_row())
+                 for (kind, key, year), (label, digest) in sketches.items()])
+            counts = _row_counts(connection, {source: (last_rowid, None)
+                                              for source, last_rowid in read.items()})
+            connection.executemany(
+                'insert or replace into salary_sketch_state values (?, ?, ?)',
+                [(source, last_rowid, counts[source]) for source, last_rowid in read.items()])
+        except Exception:
+            connection.execute('rollback')
+            raise
+        connection.execute('commit')
+    return len(sketches)
+
+
+def _read_table(connection, groups=None):
+    sketches = {}
+    for kind, key, year, label, *row in connection.execute('select * from salary_sketches'):
+        if groups is None or (kind, key, year) in groups:
+            sketches[(kind, key, year)] = (label, TDigest.from_row(*row))
+    return sketches
+
+
+class SalarySketches:
+    """The sketches of one database, merged and answered on demand.
+
+    Merged sketches are kept, so every (group, year) is merged once and
+    later queries only interpolate.
+    """
+
+    def __init__(self, sketches):
+        self.labels = {}
+        self.years = {}
+        for (kind, key, year), (label, digest) in sketches.items():
+            self.labels[(kind, key)] = label
+            self.years.setdefault((kind, key), {})[year] = digest
+
+        self._merged = {}
+        self._lock = threading.Lock()
+
+    def groups(self, kind):
+        """[(key, label)] of one kind, by label."""
+        return sorted(((key, label) for (k, key), label in self.labels.items() if k == kind),
+                      key=lambda group: str(group[1]))
+
+    def digest(self, kind, key='', up_to=None):
+        """The merged sketch of a group's employees hired up to year `up_to`."""
+        with self._lock:
+            if (kind, key, up_to) not in self._merged:
+                years = self.years.get((kind, key), {})
+                self._merged[(kind, key, up_to)] = TDigest.merge(
+                    [digest for year, digest in years.items() if up_to is None or year <= up_to])
+            return self._merged[(kind, key, up_to)]
+
+    def quantiles(self, kind, key='', up_to=None, percentiles=QUANTILES):
+        """The `percentiles` of the group's salaries; None for a group without any."""
+        digest = self.digest(kind, key, up_to)
+        if digest is None:
+            return None
+        return digest.quantiles(percentiles)
+
+
+def load(connection):
+    """The stored sketches, or ones computed from `connection` when there are none."""
+    if has_sketches(connection):
+        return SalarySketches(_read_table(connection))
+    return SalarySketches(read_salaries(connection)[0])
+
+
+def exact_salaries(connection):
+    """{(kind, key): (label, [(year, salary)])}, every salary the sketches were built from."""
+    salaries = {}
+    for source, sql in SALARIES.items():
+        for row in connection.execute(sql, (0,)):
+            for kind, key, label in group_keys(row):
+                salaries.setdefault((kind, key), (label, []))[1].append((row[4], row[5]))
+    return salaries
+
+
+def check(connection, sketches=None, percentiles=QUANTILES):
+    """[(kind, key, label, up to year, relative error)] of every group and year.
+
+    The error is the largest one among `percentiles`, against
+    np.percentile over the same salaries.
+    """
+    import numpy as np
+
+    sketches = sketches or load(connection)
+    errors = []
+    for (kind, key), (label, rows) in sorted(exact_salaries(connection).items()):
+        for up_to in [None] + sorted(sketches.years.get((kind, key), {})):
+            values = [salary for year, salary in rows
+                      if year is not None and (up_to is None or year <= up_to)]
+            if not values:
+                continue
+            exact = np.percentile(values, percentiles)
+            approximate = np.array(sketches.quantiles(kind, key, up_to, percentiles))
+            error = np.max(np.abs(approximate - exact) / np.maximum(np.abs(exact), 1))
+            errors.append((kind, key, label, up_to, float(error)))
+    return errors
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_file = args[0] if args else os.environ.get('HR_DB_FILE', 'assets/hr.db')
+    print(f'{build(db_file, rebuild="--rebuild" in sys.argv)} salary sketches written to {db_file}')
+
+    if '--check' in sys.argv:
+        with closing(sqlite3.connect(db_file)) as connection:
+            errors = check(connection)
+        kind, key, label, up_to, error = max(errors, key=lambda e: e[-1])
+        print(f'{len(errors)} groups and years checked against np.percentile, largest error '
+              f'{error:.4%} ({kind} {label}, hired up to {up_to or "now"})')
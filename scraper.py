@@ -0,0 +1,230 @@
+"""UK salary percentiles from itjobswatch.co.uk, one page per source.
+
+A source is the part of the page URL between /jobs/ and .do, e.g.
+`uk/sqlite` or `london/python`. Pages are fetched concurrently over one
+pooled session, with timeouts and retries with exponential backoff.
+SCRAPE_BASE_URL points the scraper at another host, such as the stub
+site in benchmarks/stub_site.py. Pages are parsed with lxml when it is
+installed, with the slower html.parser otherwise.
+"""
+import os
+import re
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+
+BASE_URL = os.environ.get('SCRAPE_BASE_URL', 'https://www.itjobswatch.co.uk')
+SOURCES = [s.strip() for s in os.environ.get('SCRAPE_SOURCES', 'uk/sqlite').split(',') if s.strip()]
+
+# pages fetched at once, and the pool size of the shared session
+WORKERS = int(os.environ.get('SCRAPE_WORKERS', 8))
+
+# (connect, read) seconds
+TIMEOUT = (5, 30)
+
+# 3 retries on connection errors, 429 and 5xx, after 0.5s, 1s and 2s
+RETRIES = dict(total=3, backoff_factor=0.5,
+               status_forcelist=(429, 500, 502, 503, 504),
+               allowed_methods=('GET',))
+
+
+# the percentile lines drawn per source, the median as 50
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# lxml when installed, it is several times faster than html.parser
+BACKEND = os.environ.get('SCRAPE_PARSER', 'lxml' if importlib.util.find_spec('lxml')
+                         else 'html.parser')
+
+# '10th Percentile', 'Median annual salary (50th Percentile)', ... anywhere in
+# the label; a bare 'Median' is the 50th, other median rows ('Median % Change',
+# 'UK median annual salary') are not percentiles
+LABEL = re.compile(r'(\d{1,2})(?:st|nd|rd|th)\s+percentile', re.IGNORECASE)
+MEDIAN = re.compile(r'\s*median\s*$', re.IGNORECASE)
+YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+# everything but digits, the decimal point and the \0 joining the figures
+NOT_A_DIGIT = re.compile(r'[^\d.\0]')
+
+
+def page_url(source, base_url=BASE_URL):
+    return f'{base_url}/jobs/{source}.do'
+
+
+def make_session(workers=WORKERS, retries=RETRIES):
+    # requests and bs4 are only imported once something is scraped
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers,
+                          max_retries=Retry(**retries))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _summary_rows_lxml(html):
+    import lxml.html
+
+    doc = lxml.html.fromstring(html)
+    tables = doc.xpath('//table[contains(concat(" ", normalize-space(@class), " "), " summary ")]')
+    if not tables:
+        raise ValueError('no summary table on the page')
+    for tr in tables[0].iter('tr'):
+        yield [(cell.tag, cell.get('class') or '', cell.text_content())
+               for cell in tr if cell.tag in ('th', 'td')]
+
+
+def _summary_rows_bs4(html):
+    import bs4
+
+    # only the summary table is turned into a tree, the rest of the page is skipped
+    soup = bs4.BeautifulSoup(html, 'html.parser',
+                             parse_only=bs4.SoupStrainer('table', class_='summary'))
+    table = soup.find('table', class_='summary')
+    if table is None:
+        raise ValueError('no summary table on the page')
+    for tr in table.find_all('tr'):
+        yield [(cell.name, ' '.join(cell.get('class', [])), cell.get_text())
+               for cell in tr.find_all(['th', 'td'], recursive=False)]
+
+
+BACKENDS = {'lxml': _summary_rows_lxml, 'html.parser': _summary_rows_bs4}
+
+
+def _summary(html, backend):
+    """(years or None, percentiles, figure texts per percentile), one pass over the rows."""
+    years, labels, figures = None, [], []
+    for cells in BACKENDS[backend](html):
+        if not cells:
+            continue
+        tag, _, text = cells[0]
+        if years is None and tag == 'th':
+            found = [YEAR.search(text) for _, _, text in cells[1:]]
+            if found and all(found):
+                years = [int(m.group()) for m in found]
+            continue
+
+        match = LABEL.search(text)
+        if match is None and MEDIAN.match(text) is None:
+            continue
+        labels.append(int(match.group(1)) if match else 50)
+        figures.append([text for _, cls, text in cells[1:] if 'fig' in cls.split()])
+
+    # rows with fewer figures are padded with blanks
+    width = max(map(len, figures), default=0)
+    figures = [row + [''] * (width - len(row)) for row in figures]
+    if years is not None and len(years) != width:
+        years = None
+    return years, labels, figures
+
+
+def _to_numbers(texts):
+    """'£52,500' -> 52500.0, '-' and blanks -> NaN, all texts in one go."""
+    import numpy as np
+    import pandas as pd
+
+    if not texts:
+        return np.empty(0)
+    cleaned = NOT_A_DIGIT.sub('', '\0'.join(texts)).split('\0')
+    return pd.to_numeric(np.array(cleaned, dtype=object), errors='coerce').astype(float)
+
+
+def _frame(years, labels, values):
+    import numpy as np
+    import pandas as pd
+
+    width = len(values) // len(labels) if labels else 0
+    index = (pd.Index(years, name='year') if years is not None
+             else pd.RangeIndex(width, name='period'))
+    # one Int64 array per row of figures; astype('Int64') of the whole
+    # frame costs several times the rest of the parse
+    rows = np.round(values.reshape(len(labels), width))
+    columns = {n: pd.arrays.IntegerArray(np.nan_to_num(row).astype('int64'), np.isnan(row))
+               for n, row in enumerate(rows)}
+    frame = pd.DataFrame(columns, index=index)
+    frame.columns = pd.Index(labels, name='percentile')
+    return frame
+
+
+def parse_frame(html, backend=BACKEND):
+    """Every percentile row of the summary table as a typed frame.
+
+    One column per percentile (the median as 50), one row per period,
+    indexed by the year in the column header, or by position on a page
+    without year headers. Missing figures are <NA>.
+    """
+    years, labels, figures = _summary(html, backend)
+    values = _to_numbers([text for row in figures for text in row])
+    return _frame(years, labels, values)
+
+
+def parse_many(pages, backend=BACKEND):
+    """parse_frame() of many pages at once, sorted by (page number, year)."""
+    import pandas as pd
+
+    summaries = [_summary(html, backend) for html in pages]
+    values = _to_numbers([text for _, _, figures in summaries for row in figures for text in row])
+
+    # one (page, period, percentile) label per figure, in the order of `values`
+    page_ids, periods, percentiles = [], [], []
+    for n, (years, labels, figures) in enumerate(summaries):
+        width = len(figures[0]) if figures else 0
+        columns = years if years is not None else range(width)
+        for p in labels:
+            page_ids += [n] * width
+            periods += columns
+            percentiles += [p] * width
+
+    long = pd.DataFrame({'page': page_ids, 'year': periods,
+                         'percentile': percentiles, 'salary': values})
+    frame = long.set_index(['page', 'year', 'percentile'])['salary'].unstack('percentile')
+    return frame.round().astype('Int64')
+
+
+def parse(html, backend=BACKEND):
+    """{percentile: {year: salary or None}}, from the frame of parse_frame().
+
+    The years keep the page's column order, newest first. A page without
+    year headers raises ValueError, its columns could not be placed.
+    """
+    import pandas as pd
+
+    frame = parse_frame(html, backend)
+    if frame.index.name != 'year':
+        raise ValueError('no years in the header of the summary table')
+    return {int(p): {int(y): None if pd.isna(v) else int(v) for y, v in column.items()}
+            for p, column in frame.items()}
+
+
+def scrape_page(session, source, base_url=BASE_URL, timeout=TIMEOUT):
+    response = session.get(page_url(source, base_url), timeout=timeout)
+    response.raise_for_status()
+    return parse(response.content)
+
+
+def scrape(sources=None, base_url=BASE_URL, workers=WORKERS):
+    """{source: {percentile: {year: salary}}} for every source that could be read.
+
+    A page that still fails after its retries is left out; only when
+    every page fails is the error raised, so the caller keeps its last
+    snapshot.
+    """
+    sources = SOURCES if sources is None else sources
+
+    out, errors = {}, {}
+    with make_session(workers) as session, \
+            ThreadPoolExecutor(max_workers=min(workers, len(sources)) or 1) as pool:
+        futures = {source: pool.submit(scrape_page, session, source, base_url)
+                   for source in sources}
+        for source, future in futures.items():
+            try:
+                out[source] = future.result()
+            except Exception as e:
+                errors[source] = e
+
+    for source, e in errors.items():
+        print(f'could not scrape {page_url(source, base_url)}: {e}')
+    if errors and not out:
+        raise next(iter(errors.values()))
+    return out
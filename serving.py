@@ -0,0 +1,122 @@
+"""Cheaper responses: orjson encoding, compression and cached layouts.
+
+orjson, flask-compress and Brotli are optional; without them the apps
+fall back to plotly's default encoder and uncompressed responses.
+"""
+import gzip
+import json
+import threading
+import importlib.util
+
+import flask
+
+
+def has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+
+HAS_ORJSON = has_module('orjson')
+HAS_COMPRESS = has_module('flask_compress')
+HAS_BROTLI = has_module('brotli')
+
+
+def use_fast_json():
+    """Encode every figure and callback response with orjson, if installed.
+
+    Dash serializes through plotly.io.json, which then takes the orjson
+    path that handles NumPy arrays natively.
+    """
+    if HAS_ORJSON:
+        import plotly.io as pio
+        pio.json.config.default_engine = 'orjson'
+    return HAS_ORJSON
+
+
+def enable_compression(app):
+    """Compress callback and layout responses; pass `compress=HAS_COMPRESS` to Dash."""
+    if HAS_COMPRESS and HAS_BROTLI:
+        # Dash pins gzip only; Brotli's default level in flask-compress is fast
+        app.server.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+
+
+def cache_layout(app, version=lambda: None):
+    """Serve _dash-layout from bytes encoded (and compressed) once per `version`.
+
+    The static figures in the layout are otherwise re-serialized on every
+    page load. A layout function is re-run only when `version()` changes.
+    """
+    from dash._utils import to_json
+
+    cached = {}
+
+    def encode(key):
+        body = to_json(app._layout_value()).encode()
+        encodings = {'identity': body, 'gzip': gzip.compress(body, 6)}
+        if HAS_BROTLI:
+            import brotli
+            encodings['br'] = brotli.compress(body, quality=9)
+        cached.clear()
+        cached[key] = encodings
+        return encodings
+
+    def serve_layout():
+        key = version()
+        encodings = cached.get(key) or encode(key)
+
+        accepted = flask.request.headers.get('Accept-Encoding', '')
+        for encoding in ('br', 'gzip'):
+            if encoding in encodings and encoding in accepted:
+                response = flask.Response(encodings[encoding],
+                                          mimetype='application/json')
+                # flask-compress leaves responses with an encoding alone
+                response.headers['Content-Encoding'] = encoding
+                response.headers['Vary'] = 'Accept-Encoding'
+                return response
+        return flask.Response(encodings['identity'], mimetype='application/json')
+
+    endpoint = app.config.routes_pathname_prefix + '_dash-layout'
+    app.server.view_functions[endpoint] = serve_layout
+
+
+def cached_page(layout, version):
+    """A page layout function that runs `layout()` once per `version()`.
+
+    The figures of the cached layout are kept as plain JSON values, so a
+    page view only writes out lists and dicts instead of building and
+    validating plotly figures again.
+    """
+    cached = {}
+    lock = threading.Lock()
+
+    def cached_layout():
+        key = version()
+        if key not in cached:
+            with lock:
+                if key not in cached:
+                    built = plain_figures(layout())
+                    cached.clear()
+                    cached[key] = built
+        return cached[key]
+
+    return cached_layout
+
+
+def plain_figures(component):
+    # every figure of a component tree as the JSON it would be sent as
+    from plotly.io.json import to_json_plotly
+
+    for child in walk(component):
+        figure = getattr(child, 'figure', None)
+        if hasattr(figure, 'to_plotly_json'):
+            child.figure = json.loads(to_json_plotly(figure))
+    return component
+
+
+def walk(component):
+    """Every component of a layout, depth first."""
+    if isinstance(component, (list, tuple)):
+        for child in component:
+            yield from walk(child)
+    elif hasattr(component, '_type'):
+        yield component
+        yield from walk(getattr(component, 'children', None))
@@ -0,0 +1,31 @@
+BACKGROUND = '#0e2433'
+
+# layered on top of a base template, e.g. template=theme.DARK
+TEMPLATES = {'DARK': 'plotly+dashboard_dark',
+             'DARK_SEABORN': 'seaborn+dashboard_dark'}
+
+
+def register():
+    """Register 'dashboard_dark', the dark look shared by every figure of both dashboards.
+
+    Registered once instead of being written into each figure's layout after
+    it is built, and only when the first figure asks for it, so importing
+    this module does not load plotly.graph_objects.
+    """
+    import plotly.io as pio
+
+    if 'dashboard_dark' not in pio.templates:
+        import plotly.graph_objects as go
+
+        pio.templates['dashboard_dark'] = go.layout.Template(
+            layout=dict(plot_bgcolor=BACKGROUND,
+                        paper_bgcolor=BACKGROUND,
+                        font_color='white'))
+
+
+def __getattr__(name):
+    # theme.DARK and theme.DARK_SEABORN register the template on first use
+    if name in TEMPLATES:
+        register()
+        return TEMPLATES[name]
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')